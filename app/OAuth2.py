@@ -2,8 +2,10 @@ from datetime import datetime, timezone, timedelta
 from jose import jwt, JWTError
 from fastapi import status, HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
+from cachetools import TTLCache
 from .models import User
 from .schemas import TokenResponseData
+from .config import settings
 import secrets
 
 # Constants
@@ -13,6 +15,11 @@ TOKEN_EXPIRE_IN_MINUTES = 30
 
 # OAuth2 password bearer token
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="/logins/token")
+oauth2_bearer_optional = OAuth2PasswordBearer(tokenUrl="/logins/token", auto_error=False)
+
+# Short-lived per-process cache of user documents keyed by email.
+# Entries are dropped explicitly when a user is deleted or resets their password.
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
 
 # Create Access Token
 def create_access_token(data: dict):
@@ -35,18 +42,49 @@ def verify_access_token(token: str, credential_exception):
         print(f"Token decoding error: {e}")  # Debug log
         raise credential_exception
 
-# Get Current User (MongoDB Beanie version)
-async def get_current_user(token: str = Depends(oauth2_bearer)):
+async def load_user(email: str):
+    user = _user_cache.get(email)
+    if user is None:
+        user = await User.find_one(User.email == email)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+        _user_cache[email] = user
+    return user
+
+
+def invalidate_user(email: str):
+    _user_cache.pop(email, None)
+
+
+# Get Current Claims: the verified token contents, without touching MongoDB when
+# AUTH_STATELESS is on. Use this for routes that only need to know who is calling.
+async def get_current_claims(token: str = Depends(oauth2_bearer)):
     credential_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired token",
     )
     token_data = verify_access_token(token, credential_exception)
 
-    user = await User.find_one(User.email == token_data.email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-    return user
+    if not settings.AUTH_STATELESS:
+        await load_user(token_data.email)
+    return token_data
+
+# Get Optional Claims: the token contents when the request carries a valid token, else None.
+# Never raises; used to tell callers apart (e.g. rate limits) on routes that allow anonymous access too.
+async def get_optional_claims(token: str | None = Depends(oauth2_bearer_optional)):
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if not payload.get("id") or not payload.get("email"):
+        return None
+    return TokenResponseData(id=payload["id"], email=payload["email"])
+
+# Get Current User (MongoDB Beanie version), for routes that need the user document
+async def get_current_user(token_data: TokenResponseData = Depends(get_current_claims)):
+    return await load_user(token_data.email)
@@ -0,0 +1,178 @@
+import time
+from datetime import datetime, timedelta, timezone
+from cachetools import TLRUCache
+from .config import settings
+from .models import CacheEntry
+from .singleflight import SingleFlight
+
+_MISSING = object()
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0        # served from the in-process LRU
+        self.l2_hits = 0     # served from the MongoDB tier
+        self.misses = 0      # had to scrape TMDB
+        self.evictions = 0   # pushed out of the LRU by size
+        self.expirations = 0 # dropped from the LRU by TTL
+        self.coalesced = 0   # waited on an identical in-flight fetch
+        self.stale = 0       # served past its TTL because the fetch failed
+
+    def as_dict(self):
+        lookups = self.hits + self.l2_hits + self.misses
+        return {
+            "hits": self.hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced": self.coalesced,
+            "stale": self.stale,
+            "hit_ratio": round((self.hits + self.l2_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class _CountingLRU(TLRUCache):
+    """LRU of (fresh_until, value) items.
+
+    Items stay CACHE_STALE_GRACE seconds past fresh_until, so a stale copy is
+    still around to serve if refreshing it fails.
+    """
+
+    def __init__(self, maxsize, stats):
+        super().__init__(maxsize, ttu=lambda _key, item, _now: item[0] + settings.CACHE_STALE_GRACE, timer=time.time)
+        self._stats = stats
+
+    def popitem(self):
+        item = super().popitem()
+        self._stats.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self._stats.expirations += len(expired)
+        return expired
+
+
+class ScrapeCache:
+    """Two-tier TTL cache in front of the TMDB scraper.
+
+    Lookups hit a per-process LRU first, then the `scrape_cache` collection so
+    warm entries survive restarts and are shared between workers. MongoDB
+    failures never fail the request; the cache just degrades to the LRU.
+    """
+
+    def __init__(self, namespace: str, ttl: int, maxsize: int = settings.CACHE_MAX_ENTRIES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lru = _CountingLRU(maxsize, self.stats)
+        self._flights = SingleFlight()
+
+    def _key(self, key: str):
+        return f"{self.namespace}:{key}"
+
+    def _fresh(self, key: str):
+        item = self._lru.get(key)
+        if item is not None and item[0] > time.time():
+            return item
+        return None
+
+    async def get(self, key: str):
+        """Return the cached value for `key`, or `_MISSING`."""
+        item = self._fresh(key)
+        if item is not None:
+            self.stats.hits += 1
+            return item[1]
+
+        if settings.CACHE_PERSISTENT:
+            try:
+                entry = await CacheEntry.find_one(
+                    CacheEntry.key == self._key(key),
+                    CacheEntry.expires_at > datetime.now(timezone.utc),
+                )
+            except Exception as e:
+                print(f"Cache lookup failed for {self._key(key)}: {e}")
+                entry = None
+            if entry:
+                self.stats.l2_hits += 1
+                expires_at = entry.expires_at.replace(tzinfo=timezone.utc).timestamp()
+                self._lru[key] = (expires_at, entry.value)
+                return entry.value
+
+        self.stats.misses += 1
+        return _MISSING
+
+    async def set(self, key: str, value, ttl: int | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        self._lru[key] = (expires_at, value)
+
+        if settings.CACHE_PERSISTENT:
+            try:
+                await CacheEntry.get_motor_collection().update_one(
+                    {"key": self._key(key)},
+                    {"$set": {
+                        "namespace": self.namespace,
+                        "value": value,
+                        "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl),
+                    }},
+                    upsert=True,
+                )
+            except Exception as e:
+                print(f"Cache write failed for {self._key(key)}: {e}")
+
+    async def get_or_fetch(self, key: str, fetch, cacheable=lambda value: True, ttl_for=None):
+        """Return the cached value for `key`, calling `fetch()` and caching the result on a miss.
+
+        Concurrent misses for the same key share a single lookup and fetch.
+        `ttl_for(value)` may override the TTL per value (e.g. shorter for "not found").
+        If the fetch raises or returns something not cacheable (the upstream is
+        failing) and a copy expired less than CACHE_STALE_GRACE ago is still in
+        the LRU, that copy is served instead.
+        """
+        item = self._fresh(key)
+        if item is not None:
+            self.stats.hits += 1
+            return item[1]
+
+        if key in self._flights:
+            self.stats.coalesced += 1
+        return await self._flights.do(key, lambda: self._load(key, fetch, cacheable, ttl_for))
+
+    async def _load(self, key, fetch, cacheable, ttl_for):
+        value = await self.get(key)
+        if value is not _MISSING:
+            return value
+
+        try:
+            value = await fetch()
+        except Exception as e:
+            stale = self._lru.get(key)
+            if stale is None:
+                raise
+            print(f"Serving stale {self._key(key)} after fetch failed: {e}")
+            self.stats.stale += 1
+            return stale[1]
+
+        if cacheable(value):
+            await self.set(key, value, ttl_for(value) if ttl_for else None)
+            return value
+
+        stale = self._lru.get(key)
+        if stale is not None:
+            self.stats.stale += 1
+            return stale[1]
+        return value
+
+
+search_cache = ScrapeCache("search", settings.CACHE_TTL_SEARCH)
+details_cache = ScrapeCache("details", settings.CACHE_TTL_DETAILS)
+category_cache = ScrapeCache("category", settings.CACHE_TTL_CATEGORY)
+trailer_cache = ScrapeCache("trailer", settings.CACHE_TTL_TRAILER)
+
+caches = [search_cache, details_cache, category_cache, trailer_cache]
+
+
+def cache_stats():
+    return {cache.namespace: cache.stats.as_dict() for cache in caches}
@@ -0,0 +1,85 @@
+"""Response compression: Brotli when the optional `brotli` package is installed
+and the client accepts it, gzip otherwise, for bodies above COMPRESSION_MIN_SIZE.
+
+Built on Starlette's GZip responders, with two changes: streamed chunks
+(NDJSON / SSE category pages) are flushed as they are written instead of
+waiting in the compressor, and strong ETags are sent as weak to clients
+that accept a compressed encoding, since the bytes on the wire are not the
+ones the tag names. That covers every response to such a client, small
+bodies and 304s included, so a 304 always carries the validator the
+matching 200 carried.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class _WeakETagResponder(IdentityResponder):
+    async def __call__(self, scope, receive, send):
+        async def send_with_weak_etag(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["etag"] = "W/" + etag
+            await send(message)
+
+        await super().__call__(scope, receive, send_with_weak_etag)
+
+
+class _GZipResponder(_WeakETagResponder, GZipResponder):
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        self.gzip_file.write(body)
+        if more_body:
+            self.gzip_file.flush()
+        else:
+            self.gzip_file.close()
+        body = self.gzip_buffer.getvalue()
+        self.gzip_buffer.seek(0)
+        self.gzip_buffer.truncate()
+        return body
+
+
+class _BrotliResponder(_WeakETagResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        return compressed + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+def _accepts(accept_encoding: str, coding: str):
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept_encoding, "br"):
+            responder = _BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif _accepts(accept_encoding, "gzip"):
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -16,6 +16,106 @@ class Settings(BaseSettings):
     YOUTUBE_API_KEY:str
     YOUTUBE_API_URL:str
 
+    # Shared outbound HTTP client (TMDB / YouTube)
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = True
+    HTML_PARSER: str = "lxml"  # BeautifulSoup backend: "lxml" (falls back when missing) or "html.parser"
+    PARSE_EXECUTOR: str = "process"  # where HTML is parsed: "process", "thread" or "inline"
+    PARSE_WORKERS: int = 0  # 0 = one per CPU core
+    DETAILS_BRANCH_TIMEOUT: float = 8.0  # per sub-page (watch / backdrops) in get_movie_details
+
+    # Outbound governor on the shared client (app/upstream.py); limits are per upstream host
+    UPSTREAM_MAX_CONCURRENCY: int = 64  # requests in flight across all hosts
+    UPSTREAM_HOST_CONCURRENCY: int = 16
+    UPSTREAM_RATE: float = 20.0  # requests per second
+    UPSTREAM_BURST: int = 40
+    UPSTREAM_QUEUE_TIMEOUT: float = 5.0  # longest wait for a free slot before failing fast
+    UPSTREAM_RETRIES: int = 2  # extra attempts for GETs on 429 / 5xx / transport errors
+    UPSTREAM_BACKOFF: float = 0.25  # base of the jittered exponential backoff, seconds
+    UPSTREAM_BACKOFF_MAX: float = 4.0
+    BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures that open a host's circuit
+    BREAKER_RESET_TIMEOUT: float = 30.0  # seconds before a trial request is let through
+
+    # Scrape cache (app/cache.py); TTLs are in seconds
+    CACHE_TTL_SEARCH: int = 6 * 60 * 60
+    CACHE_TTL_DETAILS: int = 7 * 24 * 60 * 60
+    CACHE_TTL_CATEGORY: int = 2 * 60 * 60
+    CACHE_TTL_TRAILER: int = 30 * 24 * 60 * 60
+    CACHE_TTL_TRAILER_NOT_FOUND: int = 24 * 60 * 60
+    CACHE_MAX_ENTRIES: int = 1024  # per endpoint family, in-process tier
+    CACHE_PERSISTENT: bool = True  # also keep entries in MongoDB
+    CACHE_STALE_GRACE: int = 24 * 60 * 60  # how long past its TTL an entry may be served while the upstream fails
+
+    # Background refresh of the category listings (app/precompute.py)
+    CATEGORY_REFRESH_ENABLED: bool = True
+    CATEGORY_REFRESH_INTERVAL: int = 30 * 60
+
+    # YouTube Data API quota (app/trailers.py); a search costs 100 of the 10,000 daily units
+    YOUTUBE_DAILY_QUOTA: int = 10000
+    YOUTUBE_SEARCH_COST: int = 100
+    YOUTUBE_PREFETCH_RESERVE: int = 2000  # background prefetches stop once fewer units than this remain
+    TRAILER_PREFETCH_ENABLED: bool = True
+
+    # Latency metrics (app/metrics.py): /metrics endpoint and Server-Timing header
+    METRICS_ENABLED: bool = True
+    LOOP_LAG_INTERVAL: float = 0.5  # seconds between event-loop lag probes
+
+    # Outbound mail queue (app/mail_queue.py)
+    MAIL_WORKER_ENABLED: bool = True
+    MAIL_BATCH_SIZE: int = 50  # jobs claimed and sent over one SMTP session per round
+    MAIL_POLL_INTERVAL: float = 5.0  # seconds between queue checks when idle
+    MAIL_MAX_ATTEMPTS: int = 6
+    MAIL_RETRY_BACKOFF: float = 30.0  # first retry delay, doubled per attempt
+    MAIL_RETRY_BACKOFF_MAX: float = 3600.0
+    MAIL_LEASE: int = 300  # seconds a claimed job stays invisible to other workers
+    MAIL_RETENTION: int = 7 * 24 * 60 * 60  # keep sent / failed jobs this long
+    MAIL_SMTP_TIMEOUT: float = 30.0
+    MAIL_SMTP_IDLE_TIMEOUT: float = 60.0  # reconnect rather than reuse a session idle this long
+    MAIL_SMTP_MAX_MESSAGES: int = 100  # messages per SMTP session before reconnecting
+    MAIL_DEFAULT_LOCALE: str = "en"  # templates/email/<locale>/ used when no better match exists
+
+    # Conditional GETs (app/http_cache.py); the routes need a bearer token, so responses stay "private"
+    ETAG_MIDDLEWARE_ENABLED: bool = True  # body-hash ETags for reads without a cheaper validator
+    CACHE_CONTROL_CATEGORY: str = "private, max-age=300, stale-while-revalidate=1800"
+    CACHE_CONTROL_SEARCH: str = "private, max-age=600, stale-while-revalidate=3600"
+    CACHE_CONTROL_DETAILS: str = "private, max-age=3600, stale-while-revalidate=86400"
+    CACHE_CONTROL_TRAILER: str = "private, max-age=86400, stale-while-revalidate=604800"
+    CACHE_CONTROL_REVIEWS: str = "private, no-cache"  # always revalidated; a 304 costs one summary lookup
+
+    # Response compression (app/compression.py); Brotli needs the optional `brotli` package
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller bodies are sent as is
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # Per-client rate limits (app/ratelimit.py); budgets are "<requests>/<second|minute|hour|day>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "mongo" (shared by every worker)
+    RATE_LIMIT_MAX_KEYS: int = 100000  # clients tracked per process by the memory backend
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # key anonymous clients on X-Forwarded-For (behind a proxy only)
+    RATE_LIMIT_SEARCH: str = "30/minute"
+    RATE_LIMIT_DETAILS: str = "60/minute"  # details and trailer lookups
+    RATE_LIMIT_CATEGORY: str = "120/minute"
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_SIGNUP: str = "5/hour"
+    RATE_LIMIT_PASSWORD_RESET: str = "5/hour"
+    RATE_LIMIT_REVIEW_WRITE: str = "30/minute"
+
+    # Startup explain() of the known query paths (app/indexes.py)
+    INDEX_CHECK_ENABLED: bool = True
+
+    # Authentication (app/OAuth2.py)
+    AUTH_STATELESS: bool = True  # trust verified token claims without a per-request user lookup
+    USER_CACHE_TTL: int = 60
+    USER_CACHE_SIZE: int = 10000
+
+    # Password hashing (app/utils.py)
+    BCRYPT_ROUNDS: int = 12  # changing this rehashes passwords on next login
+    HASH_WORKERS: int = 0  # bcrypt threads, 0 = one per CPU core
+
     class Config:
         env_file = ".env"  # Load environment variables from .env file
 
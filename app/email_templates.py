@@ -0,0 +1,54 @@
+"""Email templates, compiled once at startup and rendered by the mail worker.
+
+Each notification is three files under templates/email/<locale>/:
+<name>.subject.txt, <name>.txt and <name>.html. A locale without its own
+copy falls back to its base language ("pt-BR" -> "pt") and then to
+MAIL_DEFAULT_LOCALE.
+"""
+from pathlib import Path
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, TemplateNotFound, select_autoescape
+from .config import settings
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates" / "email"
+
+
+class EmailTemplates:
+    def __init__(self, directory: Path):
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,  # a missing variable fails the job instead of mailing a blank
+            auto_reload=False,  # templates only change with a deploy
+            cache_size=-1,  # never evict a compiled template
+        )
+
+    def load(self):
+        """Compile every template up front so a syntax error fails startup, not a send."""
+        for name in self.env.list_templates():
+            self.env.get_template(name)
+
+    def _locales(self, locale: str | None):
+        candidates = []
+        if locale:
+            locale = locale.replace("_", "-")
+            candidates += [locale, locale.split("-")[0]]
+        candidates.append(settings.MAIL_DEFAULT_LOCALE)
+        return list(dict.fromkeys(candidates))
+
+    def _get(self, name: str, locale: str | None):
+        for candidate in self._locales(locale):
+            try:
+                return self.env.get_template(f"{candidate}/{name}")
+            except TemplateNotFound:
+                continue
+        raise TemplateNotFound(name)
+
+    def render(self, name: str, context: dict, locale: str | None = None):
+        """Return (subject, text, html) for the notification `name`."""
+        subject = self._get(f"{name}.subject.txt", locale).render(context).strip()
+        text = self._get(f"{name}.txt", locale).render(context)
+        html = self._get(f"{name}.html", locale).render(context)
+        return subject, text, html
+
+
+email_templates = EmailTemplates(TEMPLATE_DIR)
@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .config import settings
+
+# Executor for CPU-bound HTML parsing, created in the app lifespan.
+# None means "parse inline on the event loop" (PARSE_EXECUTOR="inline" or outside the app).
+_parse_executor: Executor | None = None
+
+# Dedicated pool for bcrypt, so a login burst queues here instead of starving
+# the default executor. bcrypt releases the GIL, so threads scale across cores.
+_hash_executor: ThreadPoolExecutor | None = None
+
+
+def _worker_count(configured: int):
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+def _new_parse_executor():
+    workers = _worker_count(settings.PARSE_WORKERS)
+    if settings.PARSE_EXECUTOR == "process":
+        # spawn keeps workers from inheriting the event loop and Mongo client threads;
+        # they only need to import app.parsing
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    if settings.PARSE_EXECUTOR == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    raise ValueError(f"Unknown PARSE_EXECUTOR '{settings.PARSE_EXECUTOR}', expected process, thread or inline")
+
+
+def init_parse_executor():
+    global _parse_executor
+    if _parse_executor is not None or settings.PARSE_EXECUTOR == "inline":
+        return _parse_executor
+    _parse_executor = _new_parse_executor()
+    return _parse_executor
+
+
+def _replace_broken_executor(broken: Executor):
+    """Swap a process pool that lost a worker (OOM kill, crash in lxml) for a new one.
+
+    A broken ProcessPoolExecutor rejects every later task, so without this a
+    single dead worker would fail all parsing until the app restarts.
+    """
+    global _parse_executor
+    if _parse_executor is broken:  # concurrent callers replace it only once
+        print("Parse worker pool broke, starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = _new_parse_executor()
+    return _parse_executor
+
+
+def shutdown_parse_executor():
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=True, cancel_futures=True)
+        _parse_executor = None
+
+
+async def run_parse(parser, html: str, *args):
+    """Run `parser(html, *args)` off the event loop; it must return plain, picklable data."""
+    executor = _parse_executor
+    if executor is None:
+        return parser(html, *args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, parser, html, *args)
+    except BrokenProcessPool:
+        executor = _replace_broken_executor(executor)
+
+    try:
+        return await loop.run_in_executor(executor, parser, html, *args)
+    except BrokenProcessPool as e:
+        print(f"Parse worker pool broke again, parsing inline: {e}")
+        return parser(html, *args)
+
+
+def get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=_worker_count(settings.HASH_WORKERS), thread_name_prefix="bcrypt")
+    return _hash_executor
+
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
@@ -0,0 +1,78 @@
+"""Conditional GET support: strong ETags, If-None-Match -> 304 and Cache-Control.
+
+Routes that can name their representation without building it set the
+ETag themselves and answer 304 before doing the work: category listings
+from their pre-encoded snapshot, review pages from the movie summary's
+version counter. ETagMiddleware covers the remaining JSON reads by hashing
+the finished body, which saves the transfer (not the work) on a repeat.
+"""
+import hashlib
+from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
+
+
+def make_etag(body: bytes):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: str | None, etag: str):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def etag_matches(request: Request, etag: str):
+    return _matches(request.headers.get("if-none-match"), etag)
+
+
+def not_modified(etag: str, cache_control: str):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_validators(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+class ETagMiddleware:
+    """Adds a body-hash ETag to single-chunk 200 GET responses that have none and answers
+    a matching If-None-Match with 304. Streamed responses are passed through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+
+        if_none_match = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"if-none-match"), None)
+        start = None  # held back until the body shows whether we can hash it
+
+        async def send_with_etag(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if message["status"] == 200 and "etag" not in headers:
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                held, start = start, None
+                if message.get("more_body", False):
+                    await send(held)
+                else:
+                    etag = make_etag(message.get("body", b""))
+                    headers = MutableHeaders(raw=list(held["headers"]))
+                    headers["etag"] = etag
+                    if _matches(if_none_match, etag):
+                        del headers["content-length"]
+                        del headers["content-type"]
+                        await send({**held, "status": 304, "headers": headers.raw})
+                        message = {"type": "http.response.body", "body": b""}
+                    else:
+                        await send({**held, "headers": headers.raw})
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
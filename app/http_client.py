@@ -0,0 +1,48 @@
+import httpx
+from .config import settings
+from .upstream import GovernedTransport
+
+# Shared outbound client, created once in the app lifespan so every scrape
+# reuses pooled keep-alive (and HTTP/2) connections instead of opening new ones.
+_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    transport = httpx.AsyncHTTPTransport(http2=settings.HTTP2_ENABLED, limits=limits)
+    return httpx.AsyncClient(
+        transport=GovernedTransport(transport),
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+        follow_redirects=True,
+    )
+
+
+async def init_http_client():
+    global _client
+    if _client is None:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client; only valid while the app lifespan is running."""
+    if _client is None:
+        raise RuntimeError("HTTP client is not initialised; it is created in the app lifespan")
+    return _client
+
+
+def get_governor() -> GovernedTransport | None:
+    """The outbound governor of the shared client, for its circuit-breaker states."""
+    transport = getattr(_client, "_transport", None)
+    return transport if isinstance(transport, GovernedTransport) else None
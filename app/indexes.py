@@ -0,0 +1,63 @@
+"""Startup check that every known query path is served by an index.
+
+Beanie builds the indexes declared in each model's Settings.indexes during
+init_beanie; this module then explain()s the queries the routers actually
+run and prints the ones whose winning plan is a collection scan (or an
+in-memory sort), so a missing or mistyped index shows up in the logs on
+deploy instead of as a slow endpoint later.
+"""
+from datetime import datetime, timezone
+from bson import ObjectId
+from .models import User, Review, ReviewItem, CacheEntry, ApiQuota, MailJob, RateLimitWindow, REVIEW_SORTS
+from .mail_queue import claimable_filter, CLAIM_SORT
+
+# (name, model, filter, sort); the values are placeholders, only the shape matters to the planner
+QUERY_PATHS = [
+    ("user by email", User, {"email": ""}, None),
+    ("movie summary", Review, {"movie_name": "", "release_date": ""}, None),
+    ("user's review", ReviewItem, {"movie_name": "", "release_date": "", "created_by": ObjectId()}, None),
+    *[
+        (f"reviews page ({sort})", ReviewItem, {"movie_name": "", "release_date": ""}, keys)
+        for sort, keys in REVIEW_SORTS.items()
+    ],
+    ("scrape cache entry", CacheEntry, {"key": ""}, None),
+    ("api quota counter", ApiQuota, {"key": ""}, None),
+    ("rate limit window", RateLimitWindow, {"key": ""}, None),
+    ("claimable mail jobs", MailJob, claimable_filter(datetime.now(timezone.utc)), CLAIM_SORT),
+]
+
+SLOW_STAGES = {"COLLSCAN", "SORT"}
+
+
+def _stages(plan):
+    """Yield every stage name in an explain() plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+async def check_query_paths():
+    """Explain every entry in QUERY_PATHS and print those that would scan; returns their names."""
+    unindexed = []
+    for name, model, query, sort in QUERY_PATHS:
+        cursor = model.get_motor_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explained = await cursor.explain()
+        except Exception as e:
+            # e.g. an in-memory test double without explain support
+            print(f"Index check skipped: {e}")
+            return unindexed
+
+        stages = set(_stages(explained.get("queryPlanner", {}).get("winningPlan", {})))
+        slow = stages & SLOW_STAGES
+        if slow:
+            unindexed.append(name)
+            print(f"Query path '{name}' on {model.get_motor_collection().name} is not index-backed: {', '.join(sorted(slow))}")
+    return unindexed
@@ -0,0 +1,154 @@
+"""Durable outbound mail queue.
+
+Request handlers only insert a MailJob naming a template; the worker
+started in the app lifespan claims due jobs one at a time, right before
+sending each (a lease, so several app processes can share the queue and a
+crashed worker's jobs are picked up again), renders them, sends them over
+one reused SMTP session and reschedules failures with exponential backoff
+until MAIL_MAX_ATTEMPTS. Permanent failures (5xx replies, broken templates)
+are not retried.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+import aiosmtplib
+from jinja2 import TemplateError
+from pymongo import ReturnDocument
+from .config import settings
+from .email_templates import email_templates
+from .mailer import SMTPConnection, create_message
+from .models import MailJob
+
+# Errors that mean the session (not this message) is broken; the rest of the batch is put back
+_CONNECTION_ERRORS = (aiosmtplib.SMTPConnectError, aiosmtplib.SMTPServerDisconnected,
+                      aiosmtplib.SMTPTimeoutError, aiosmtplib.SMTPAuthenticationError, OSError)
+
+
+def _permanent(error: Exception):
+    """True when retrying cannot help: the server rejected the message itself with a 5xx reply."""
+    if isinstance(error, _CONNECTION_ERRORS):
+        return False
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(refused.code >= 500 for refused in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+    return isinstance(error, TemplateError)
+
+
+async def enqueue_mail(recipients: list[str], template: str, context: dict, locale: str | None = None):
+    """Queue the notification `template`; it is rendered by the worker, not here."""
+    job = MailJob(recipients=recipients, template=template, context=context, locale=locale)
+    await job.insert()
+    mail_worker.wake()
+    return job
+
+
+CLAIM_SORT = [("next_attempt_at", 1)]
+
+
+def claimable_filter(now: datetime):
+    """Jobs a worker may claim; also explained by the startup index check (app/indexes.py)."""
+    return {"$or": [
+        {"status": "pending", "next_attempt_at": {"$lte": now}},
+        {"status": "sending", "locked_until": {"$lte": now}},  # its worker died mid-send
+    ]}
+
+
+def _backoff(attempts: int):
+    delay = min(settings.MAIL_RETRY_BACKOFF_MAX, settings.MAIL_RETRY_BACKOFF * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+class MailWorker:
+    def __init__(self):
+        self._smtp = SMTPConnection()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def wake(self):
+        self._wake.set()
+
+    async def _claim(self):
+        now = datetime.now(timezone.utc)
+        return await MailJob.get_motor_collection().find_one_and_update(
+            claimable_filter(now),
+            {"$set": {"status": "sending", "locked_until": now + timedelta(seconds=settings.MAIL_LEASE)}},
+            sort=CLAIM_SORT,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _finish(self, job, **fields):
+        await MailJob.get_motor_collection().update_one({"_id": job["_id"]}, {"$set": {"locked_until": None, **fields}})
+
+    async def _deliver(self, job):
+        now = datetime.now(timezone.utc)
+        attempts = job["attempts"] + 1
+        try:
+            subject, text, html = email_templates.render(job["template"], job["context"], job.get("locale"))
+            await self._smtp.send(create_message(job["recipients"], subject, html, text))
+        except Exception as e:
+            if _permanent(e) or attempts >= settings.MAIL_MAX_ATTEMPTS:
+                print(f"Giving up on mail {job['_id']} after {attempts} attempts: {e}")
+                await self._finish(job, status="failed", attempts=attempts, last_error=str(e),
+                                   expires_at=now + timedelta(seconds=settings.MAIL_RETENTION))
+            else:
+                await self._finish(job, status="pending", attempts=attempts, last_error=str(e),
+                                   next_attempt_at=now + _backoff(attempts))
+            raise
+        await self._finish(job, status="sent", attempts=attempts, last_error=None,
+                           expires_at=now + timedelta(seconds=settings.MAIL_RETENTION))
+
+    async def run_once(self):
+        """Send up to MAIL_BATCH_SIZE due jobs; returns how many were claimed.
+
+        Each job is claimed just before it is sent, so its lease only has to
+        cover one send and a slow batch never outlives the leases of its last
+        jobs (which another worker would then send a second time).
+        """
+        self._wake.clear()
+        claimed = 0
+        while claimed < settings.MAIL_BATCH_SIZE:
+            job = await self._claim()
+            if job is None:
+                break
+            claimed += 1
+            try:
+                await self._deliver(job)
+            except _CONNECTION_ERRORS as e:
+                # The job itself was rescheduled; leave the rest queued until the server is back
+                print(f"SMTP session failed, stopping this round: {e}")
+                break
+            except Exception as e:
+                print(f"Sending mail {job['_id']} failed: {e}")
+        return claimed
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                print(f"Mail worker round failed: {e}")
+                claimed = 0
+            if claimed < settings.MAIL_BATCH_SIZE:
+                # Queue drained: sleep until a new job is enqueued here, or poll for other workers' jobs
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.MAIL_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._smtp.close()
+
+
+mail_worker = MailWorker()
@@ -1,27 +1,79 @@
-from fastapi_mail import FastMail,ConnectionConfig,MessageSchema, MessageType
+import time
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+import aiosmtplib
 from .config import settings
-from pathlib import Path
-
-BASE_DIR=Path(__file__).resolve().parent #Base directory is set to indicate the app dir location , fro =m that we can fetch templetes location
-
-mail_config=ConnectionConfig(
-
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.VALIDATE_CERTS
-)
-
-mail=FastMail(config=mail_config)
-
-def create_message(recipients: list[str], subject: str, body: str):
-    message = MessageSchema(
-        recipients=recipients, subject=subject, body=body, subtype=MessageType.html
-    )
-    return message
\ No newline at end of file
+
+
+def create_message(recipients: list[str], subject: str, html: str, text: str | None = None):
+    """Build the message; with `text` it is multipart/alternative (plain text first, then HTML)."""
+    message = EmailMessage()
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+    if text is None:
+        message.set_content(html, subtype="html")
+    else:
+        message.set_content(text)
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+class SMTPConnection:
+    """One long-lived SMTP session, reused across messages by the mail worker.
+
+    Connects (STARTTLS / TLS and login included) on first use, reconnects when
+    the server dropped the session, after MAIL_SMTP_MAX_MESSAGES messages or
+    once it has been idle for MAIL_SMTP_IDLE_TIMEOUT seconds.
+    """
+
+    def __init__(self):
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._sent = 0
+        self._last_used = 0.0
+
+    def _stale(self):
+        return (
+            self._smtp is None
+            or not self._smtp.is_connected
+            or self._sent >= settings.MAIL_SMTP_MAX_MESSAGES
+            or time.monotonic() - self._last_used > settings.MAIL_SMTP_IDLE_TIMEOUT
+        )
+
+    async def _connect(self):
+        await self.close()
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME if settings.USE_CREDENTIALS else None,
+            password=settings.MAIL_PASSWORD if settings.USE_CREDENTIALS else None,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.VALIDATE_CERTS,
+            timeout=settings.MAIL_SMTP_TIMEOUT,
+        )
+        await smtp.connect()
+        self._smtp = smtp
+        self._sent = 0
+
+    async def send(self, message: EmailMessage):
+        if self._stale():
+            await self._connect()
+        try:
+            await self._smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # The server closed an idle session between our checks; retry once on a new one
+            await self._connect()
+            await self._smtp.send_message(message)
+        self._sent += 1
+        self._last_used = time.monotonic()
+
+    async def close(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.is_connected:
+                    await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+            self._smtp = None
@@ -1,11 +1,22 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 from contextlib import asynccontextmanager
-from .models import User, Review
-from .routers import user,reviews,auth,movies,mail
+from .models import User, Review, ReviewItem, CacheEntry, ApiQuota, MailJob, RateLimitWindow
+from .routers import user,reviews,auth,movies,mail,metrics
 from .config import settings
+from .http_client import init_http_client, close_http_client
+from .precompute import category_refresher
+from .executors import init_parse_executor, shutdown_parse_executor, shutdown_hash_executor
+from .indexes import check_query_paths
+from .trailers import cancel_prefetches
+from .mail_queue import mail_worker
+from .email_templates import email_templates
+from .metrics import MetricsMiddleware, MongoCommandMetrics, loop_lag_monitor
+from .http_cache import ETagMiddleware
+from .compression import CompressionMiddleware
  # Encode password
 DATABASE_URL = settings.DATABASE_URL
 
@@ -13,21 +24,59 @@ DATABASE_NAME = settings.DATABASE_NAME
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    client = AsyncIOMotorClient(DATABASE_URL)
+    listeners = [MongoCommandMetrics()] if settings.METRICS_ENABLED else []
+    client = AsyncIOMotorClient(DATABASE_URL, event_listeners=listeners)
     db = client[DATABASE_NAME]
-    await init_beanie(database=db, document_models=[User, Review])
+    # Also creates every index declared in the models' Settings.indexes
+    await init_beanie(
+        database=db, document_models=[User, Review, ReviewItem, CacheEntry, ApiQuota, MailJob, RateLimitWindow]
+    )
+    if settings.INDEX_CHECK_ENABLED:
+        await check_query_paths()
+    await init_http_client()
+    init_parse_executor()
+    if settings.CATEGORY_REFRESH_ENABLED:
+        category_refresher.start()
+    if settings.METRICS_ENABLED:
+        loop_lag_monitor.start()
+    if settings.MAIL_WORKER_ENABLED:
+        email_templates.load()
+        mail_worker.start()
     yield
+    await mail_worker.stop()
+    await loop_lag_monitor.stop()
+    await category_refresher.stop()
+    await cancel_prefetches()
+    await close_http_client()
+    shutdown_parse_executor()
+    shutdown_hash_executor()
     client.close()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
+# Last added runs first: CORS -> metrics -> compression -> ETag (hashes the uncompressed body) -> routes
+if settings.ETAG_MIDDLEWARE_ENABLED:
+    app.add_middleware(ETagMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"], 
-    allow_headers=["*"]
+    allow_headers=["*"],
+    # Pagination cursor of /users/getallusers; the frontend cannot read it cross-origin otherwise
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -35,4 +84,6 @@ app.include_router(user.router)
 app.include_router(auth.router)
 app.include_router(reviews.router)
 app.include_router(movies.router)
-app.include_router(mail.router)
\ No newline at end of file
+app.include_router(mail.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
\ No newline at end of file
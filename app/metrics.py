@@ -0,0 +1,202 @@
+"""In-process latency metrics.
+
+Histograms are exported in Prometheus text format at /metrics (see
+routers/metrics.py). Each request also gets a `Server-Timing` header that
+splits its time into upstream (TMDB / YouTube), parse and mongo, so a slow
+/movies/details/ can be attributed without a tracing backend. Those
+per-request durations are sums, so concurrent branches can add up to more
+than the wall time.
+"""
+import asyncio
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from pymongo import monitoring
+from .config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render_gauge(name: str, help: str, samples: list[tuple[dict, float]]):
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {value}")
+    return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series: dict[tuple, list] = {}
+        # Mongo events arrive on motor's executor threads
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(counts) for labels, counts in self._series.items()}
+        for labels, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "cineflix_http_request_duration_seconds", "Time to serve a request, by route template.",
+    ("method", "route", "status"),
+)
+UPSTREAM_LATENCY = Histogram(
+    "cineflix_upstream_request_duration_seconds", "Outbound request time including the body, by host.",
+    ("host", "status"),
+)
+PARSE_LATENCY = Histogram(
+    "cineflix_parse_duration_seconds", "HTML parse time including the executor round trip.",
+    ("parser",),
+)
+MONGO_LATENCY = Histogram(
+    "cineflix_mongo_command_duration_seconds", "MongoDB command time as reported by the driver.",
+    ("command", "outcome"),
+)
+LOOP_LAG = Histogram(
+    "cineflix_event_loop_lag_seconds", "How late the event loop woke up a sleeping task.",
+    buckets=LAG_BUCKETS,
+)
+
+histograms = [REQUEST_LATENCY, UPSTREAM_LATENCY, PARSE_LATENCY, MONGO_LATENCY, LOOP_LAG]
+
+_request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+def add_timing(name: str, seconds: float):
+    """Add `seconds` to the current request's Server-Timing entry `name`, if inside a request."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def observe_upstream(host: str, status: int | str, seconds: float):
+    UPSTREAM_LATENCY.observe(seconds, host, str(status))
+    add_timing("upstream", seconds)
+
+
+def observe_parse(parser: str, seconds: float):
+    PARSE_LATENCY.observe(seconds, parser)
+    add_timing("parse", seconds)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Passed to AsyncIOMotorClient(event_listeners=...); motor runs commands in
+    a copy of the caller's context, so the request's Server-Timing sees them too."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_LATENCY.observe(seconds, event.command_name, "ok")
+        add_timing("mongo", seconds)
+
+    def failed(self, event):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_LATENCY.observe(seconds, event.command_name, "error")
+        add_timing("mongo", seconds)
+
+
+class LoopLagMonitor:
+    """Sleeps `interval` seconds in a loop and records how late each wake-up was."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, loop.time() - start - self.interval)
+            LOOP_LAG.observe(self.last)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor(settings.LOOP_LAG_INTERVAL)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request per route template and adds the Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                entries = [*timings.items(), ("app", time.perf_counter() - start)]
+                value = ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in entries)
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (b"server-timing", value.encode()),
+                    (b"timing-allow-origin", b"*"),
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Set by FastAPI's router once a route matched; keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], route, str(status_code))
@@ -0,0 +1,127 @@
+"""One-off data migrations.
+
+    python -m app.migrations split-reviews
+    python -m app.migrations repair-ratings
+
+split-reviews moves the reviews embedded in each `reviews` document into the
+`review_items` collection (one document per review) and strips the array
+from the movie document. It is idempotent and safe to re-run: reviews are
+upserted on (movie_name, release_date, created_by).
+
+repair-ratings recomputes every movie's rating_sum / rating_count counters
+from `review_items` (bumping each summary's version), and removes summaries
+that no longer have reviews.
+"""
+import argparse
+import asyncio
+from bson import DBRef
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from .config import settings
+
+
+def _author_id(created_by):
+    # Embedded reviews hold either a DBRef (Link) or a full copy of the user document
+    if isinstance(created_by, DBRef):
+        return created_by.id
+    if isinstance(created_by, dict):
+        return created_by.get("_id") or created_by.get("id") or created_by.get("$id")
+    return created_by
+
+
+async def split_embedded_reviews(db, batch_size: int = 500):
+    movies = db["reviews"]
+    review_items = db["review_items"]
+    migrated_movies = migrated_reviews = 0
+
+    async for movie in movies.find({"reviews": {"$exists": True}}):
+        operations = []
+        ratings = []
+        for review in movie.get("reviews") or []:
+            created_by = _author_id(review.get("created_by"))
+            if created_by is None:
+                print(f"Skipping review without author on {movie['movie_name']} ({movie['release_date']})")
+                continue
+            key = {
+                "movie_name": movie["movie_name"],
+                "release_date": movie["release_date"],
+                "created_by": created_by,
+            }
+            # The upsert copies the key fields from the filter into a new document
+            operations.append(UpdateOne(key, {"$setOnInsert": {
+                "review_content": review.get("review_content", ""),
+                "rating": review.get("rating", 0.0),
+                "created_at": review.get("created_at"),
+            }}, upsert=True))
+            ratings.append(review.get("rating", 0.0))
+
+        for start in range(0, len(operations), batch_size):
+            await review_items.bulk_write(operations[start:start + batch_size], ordered=False)
+
+        await movies.update_one(
+            {"_id": movie["_id"]},
+            {"$unset": {"reviews": "", "overall_rating": ""}},
+        )
+        migrated_movies += 1
+        migrated_reviews += len(operations)
+
+    print(f"Migrated {migrated_reviews} reviews from {migrated_movies} movies")
+    await repair_rating_counters(db)
+
+
+async def repair_rating_counters(db):
+    movies = db["reviews"]
+    reviewed = set()
+    repaired = 0
+
+    totals = db["review_items"].aggregate([
+        {"$group": {
+            "_id": {"movie_name": "$movie_name", "release_date": "$release_date"},
+            "rating_sum": {"$sum": "$rating"},
+            "rating_count": {"$sum": 1},
+        }},
+    ])
+    async for total in totals:
+        key = total["_id"]
+        reviewed.add((key["movie_name"], key["release_date"]))
+        result = await movies.update_one(
+            key,
+            {"$set": {"rating_sum": total["rating_sum"], "rating_count": total["rating_count"]},
+             "$unset": {"overall_rating": ""},
+             # Invalidates cached /review/getReviews pages, whose overall_rating may have changed
+             "$inc": {"version": 1}},
+            upsert=True,
+        )
+        repaired += result.modified_count + (1 if result.upserted_id else 0)
+
+    # Summaries whose reviews are all gone
+    orphaned = [
+        movie["_id"]
+        async for movie in movies.find({}, {"movie_name": 1, "release_date": 1})
+        if (movie["movie_name"], movie["release_date"]) not in reviewed
+    ]
+    if orphaned:
+        await movies.delete_many({"_id": {"$in": orphaned}})
+
+    print(f"Recomputed rating counters on {repaired} movies, removed {len(orphaned)} empty summaries")
+
+
+COMMANDS = {
+    "split-reviews": split_embedded_reviews,
+    "repair-ratings": repair_rating_counters,
+}
+
+
+async def main(command: str):
+    client = AsyncIOMotorClient(settings.DATABASE_URL)
+    try:
+        await COMMANDS[command](client[settings.DATABASE_NAME])
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a cineflix data migration")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    asyncio.run(main(args.command))
@@ -1,30 +1,147 @@
-from beanie import Document, Link
-from pydantic import BaseModel, Field, EmailStr
+from beanie import Document, PydanticObjectId
+from pydantic import Field, EmailStr
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any
 
 class User(Document):
     name: str
-    email: EmailStr = Field(..., unique=True)
+    email: EmailStr = Field(...)
     password: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     class Settings:
-        collection = "users"  
+        collection = "users"
+        indexes = [
+            # Every login, password reset and (stateful) authenticated request looks users up by email
+            IndexModel([("email", ASCENDING)], unique=True),
+        ]
 
-class ReviewItem(BaseModel):  
+# Sort keys of /review/getReviews per ?sort=; each has a matching ReviewItem index below
+# and ends in a unique _id tie-break. Shared by the router and the startup index check.
+REVIEW_SORTS = {
+    "newest": [("created_at", -1), ("_id", -1)],
+    "highest": [("rating", -1), ("created_at", -1), ("_id", -1)],
+    "lowest": [("rating", 1), ("created_at", -1), ("_id", -1)],
+}
+
+class ReviewItem(Document):
+    """One user's review of one movie; see app/migrations.py for the old embedded layout."""
+    movie_name: str = Field(...)
+    release_date: str = Field(...)
     review_content: str = Field(default_factory=str)
-    rating: float = Field(default_factory=0.0)
-    created_by: Link[User]  # Reference to User
+    rating: float = Field(default=0.0)
+    created_by: PydanticObjectId  # User id
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    class Settings:
+        collection = "review_items"
+        indexes = [
+            # Also serves (movie_name, release_date) lookups through its prefix
+            IndexModel(
+                [("movie_name", ASCENDING), ("release_date", ASCENDING), ("created_by", ASCENDING)],
+                unique=True,
+            ),
+            # Keyset pagination, one index per sort order of /review/getReviews
+            IndexModel([("movie_name", ASCENDING), ("release_date", ASCENDING),
+                        ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("movie_name", ASCENDING), ("release_date", ASCENDING),
+                        ("rating", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("movie_name", ASCENDING), ("release_date", ASCENDING),
+                        ("rating", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        ]
+
 class Review(Document):
+    """Per-movie summary; the reviews themselves live in ReviewItem.
+
+    rating_sum / rating_count are only ever changed with atomic $inc updates
+    (see routers/reviews.py); `python -m app.migrations repair-ratings`
+    recomputes them from review_items. `version` goes up with every review
+    added, edited or deleted and is the ETag of the movie's review pages.
+    """
     movie_name: str = Field(...)
     release_date: str = Field(...)
-    overall_rating: float = Field(default=0.0)
-    reviews: List[ReviewItem] = Field(default_factory=list)
+    rating_sum: float = Field(default=0.0)
+    rating_count: int = Field(default=0)
+    version: int = Field(default=0)
+
+    @property
+    def overall_rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count > 0 else 0.0
 
     class Settings:
         collection = "reviews"
+        indexes = [
+            IndexModel([("movie_name", ASCENDING), ("release_date", ASCENDING)], unique=True),
+        ]
+
+
+class CacheEntry(Document):
+    """Second (shared) tier of the scrape cache, see app/cache.py."""
+    key: str
+    namespace: str
+    value: Any
+    expires_at: datetime
+
+    class Settings:
+        collection = "scrape_cache"
+        indexes = [
+            IndexModel([("key", ASCENDING)], unique=True),
+            # Let MongoDB purge entries once they expire
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
 
- 
\ No newline at end of file
+class ApiQuota(Document):
+    """Units spent on a metered API for one quota day, shared by every worker (see app/trailers.py)."""
+    key: str  # "<api>:<quota day>"
+    used: int = 0
+    expires_at: datetime
+
+    class Settings:
+        collection = "api_quota"
+        indexes = [
+            IndexModel([("key", ASCENDING)], unique=True),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
+class MailJob(Document):
+    """One queued email, delivered by the mail worker (see app/mail_queue.py).
+
+    The worker renders `template` (app/email_templates.py) with `context`.
+    """
+    recipients: list[str]
+    template: str
+    context: dict[str, Any] = Field(default_factory=dict)
+    locale: str | None = None
+    status: str = "pending"  # pending -> sending -> sent / failed
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    locked_until: datetime | None = None  # lease of the worker sending it
+    last_error: str | None = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: datetime | None = None  # set once delivered or given up, for the TTL index
+
+    class Settings:
+        collection = "mail_jobs"
+        indexes = [
+            # Serves both branches of the claim query ($or of due pending / lease-expired sending jobs)
+            # in next_attempt_at order, so they are merged without an in-memory sort
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING), ("locked_until", ASCENDING)]),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
+class RateLimitWindow(Document):
+    """Requests one client made to one rate-limited route in one fixed window (see app/ratelimit.py)."""
+    key: str  # "<route budget>:<client>:<window number>"
+    hits: int = 0
+    expires_at: datetime
+
+    class Settings:
+        collection = "rate_limits"
+        indexes = [
+            IndexModel([("key", ASCENDING)], unique=True),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
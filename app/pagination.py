@@ -0,0 +1,50 @@
+"""Keyset (cursor) pagination helpers.
+
+A page is read with `sort(keys).limit(limit + 1)` plus `keyset_filter(keys, last)`,
+where `last` are the sort-key values of the previous page's last document.
+Those values travel to the client as an opaque, URL-safe cursor string.
+"""
+import base64
+from datetime import datetime
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+def encode_cursor(values: list):
+    def default(value):
+        if isinstance(value, ObjectId):
+            return {"$oid": str(value)}
+        raise TypeError
+    payload = orjson.dumps(
+        [{"$date": v.isoformat()} if isinstance(v, datetime) else v for v in values],
+        default=default,
+    )
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int):
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("wrong cursor length")
+        decoded = []
+        for value in values:
+            if isinstance(value, dict) and "$oid" in value:
+                value = ObjectId(value["$oid"])
+            elif isinstance(value, dict) and "$date" in value:
+                value = datetime.fromisoformat(value["$date"])
+            decoded.append(value)
+        return decoded
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_filter(keys: list[tuple[str, int]], last: list):
+    """Mongo filter for documents strictly after `last` in the order given by `keys`."""
+    branches = []
+    for i, (field, direction) in enumerate(keys):
+        branch = {prefix: value for (prefix, _), value in zip(keys[:i], last[:i])}
+        branch[field] = {"$lt" if direction < 0 else "$gt": last[i]}
+        branches.append(branch)
+    return {"$or": branches}
@@ -0,0 +1,188 @@
+"""HTML -> plain dict parsers for the TMDB pages used by app/scraper.py.
+
+Every function takes the raw page text plus the BeautifulSoup tree builder
+to use and returns only builtin types, so they can run on any executor.
+Selectors are compiled once at import time and each element is looked up
+once per card / field.
+"""
+from bs4 import BeautifulSoup
+import re
+import soupsieve as sv
+import urllib.parse
+
+TMDB_BASE_URL = "https://www.themoviedb.org"
+
+# BeautifulSoup tree builders we know produce identical results for TMDB markup.
+# "lxml" is C-based and several times faster than the pure-Python "html.parser".
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+_SEARCH_CARD = sv.compile("div.card.v4.tight")
+_SEARCH_LINK = sv.compile("a.result")
+_SEARCH_RELEASE_DATE = sv.compile("span.release_date")
+_OVERVIEW = sv.compile("div.overview p")
+_H2 = sv.compile("h2")
+_IMG = sv.compile("img")
+_ANCHOR = sv.compile("a")
+_PARAGRAPH = sv.compile("p")
+
+_TITLE = sv.compile("div.title h2 a")
+_TITLE_RELEASE_DATE = sv.compile("div.title span.release_date")
+_PROFILE = sv.compile("li.profile")
+_CHARACTER = sv.compile("p.character")
+_CAST_CARD = sv.compile("li.card")
+_GENRE = sv.compile("span.genres a")
+_FACTS = sv.compile("div.facts")
+_RUNTIME = sv.compile("span.runtime")
+_CERTIFICATION = sv.compile("span.certification")
+_WATCH_LINK = sv.compile('a[href*="/watch"]')
+_BACKDROP = sv.compile('a[title="View Original"]')
+
+_CATEGORY_CARD = sv.compile("div.card.style_1")
+_CATEGORY_RELEASE_DATE = sv.compile("div.content p")
+
+_ORIGINAL_LANGUAGE = re.compile(r"Original Language", re.IGNORECASE)
+_STREAM = re.compile(r"Stream", re.IGNORECASE)
+_REDIRECT_TARGET = re.compile(r"r=(https%3A%2F%2F[^\&]+)")
+_YEAR = re.compile(r"\d{4}")
+
+
+def resolve_backend(name: str):
+    """Return `name` if its tree builder is importable, falling back to html.parser."""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend '{name}', expected one of {PARSER_BACKENDS}")
+    if name == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            return "html.parser"
+    return name
+
+
+def _text(element, default):
+    return element.get_text(strip=True) if element else default
+
+
+def parse_search_results(html: str, backend: str = "html.parser"):
+    soup = BeautifulSoup(html, backend)
+    movies = []
+
+    for card in _SEARCH_CARD.select(soup):
+        movie_link = _SEARCH_LINK.select_one(card)
+        if not movie_link:
+            continue
+        href = movie_link['href']
+
+        # Skip TV shows
+        if href.startswith("/tv/"):
+            continue
+
+        img = _IMG.select_one(card)
+        movies.append({
+            "title": _text(_H2.select_one(card), "Unknown"),
+            "poster": img['src'] if img else "No poster available",
+            "release_date": _text(_SEARCH_RELEASE_DATE.select_one(card), "Unknown"),
+            "overview": _text(_OVERVIEW.select_one(card), "Overview not available"),
+            "url": f"{TMDB_BASE_URL}{href}",
+        })
+
+    return movies
+
+
+def parse_movie_details(html: str, backend: str = "html.parser"):
+    """Parse the main movie page.
+
+    Returns None when no director is listed (TMDB's marker for an incomplete
+    page); otherwise the details plus `title` / `year` (used to look up the
+    trailer) and `watch_url`, the absolute URL of the watch page or None.
+    """
+    soup = BeautifulSoup(html, backend)
+
+    director = None
+    for profile in _PROFILE.select(soup):
+        character = _CHARACTER.select_one(profile)
+        if character and 'Director' in character.text:
+            director = _ANCHOR.select_one(profile).get_text(strip=True)
+            break
+
+    if not director:
+        return None
+
+    cast = []
+    for card in _CAST_CARD.select(soup):
+        img = _IMG.select_one(card)
+        cast.append((_PARAGRAPH.select_one(card).get_text(strip=True), img['src'] if img else "No Image"))
+
+    genres = [genre.get_text(strip=True) for genre in _GENRE.select(soup)]
+
+    facts_section = _FACTS.select_one(soup)
+    runtime = _text(_RUNTIME.select_one(facts_section), "Unknown") if facts_section else "Unknown"
+    certificate = _text(_CERTIFICATION.select_one(facts_section), "Unknown") if facts_section else "Unknown"
+
+    language = next(
+        (tag.find_parent().get_text(strip=True).replace("Original Language", "").strip()
+         for tag in soup.find_all('strong', string=_ORIGINAL_LANGUAGE)),
+        "Unknown"
+    )
+
+    watch_link_element = _WATCH_LINK.select_one(soup)
+    year = _YEAR.search(_text(_TITLE_RELEASE_DATE.select_one(soup), ""))
+
+    return {
+        "title": _text(_TITLE.select_one(soup), None),
+        "year": year.group() if year else None,
+        "director": director,
+        "cast": cast,
+        "genres": genres,
+        "runtime": runtime,
+        "certificate": certificate,
+        "language": language,
+        "overview": _text(_OVERVIEW.select_one(soup), "No overview available"),
+        "watch_url": f"{TMDB_BASE_URL}{watch_link_element['href']}" if watch_link_element else None,
+    }
+
+
+def parse_backdrops(html: str, backend: str = "html.parser"):
+    soup = BeautifulSoup(html, backend)
+    images = set(a['href'] for a in _BACKDROP.select(soup))
+    return list(images) if images else ["No backdrop images available"]
+
+
+def parse_watch_links(html: str, backend: str = "html.parser"):
+    soup = BeautifulSoup(html, backend)
+
+    stream_section = soup.find('h3', string=_STREAM)
+    if not stream_section:
+        return ["No watch links available"]
+
+    watch_links = []
+    seen = set()
+    for link in stream_section.find_next('ul', class_='providers').find_all('a', href=True):
+        match = _REDIRECT_TARGET.search(link['href'])
+        icon_element = link.find('img')
+        icon = icon_element['src'] if icon_element else None
+        if match and icon:
+            clean_url = urllib.parse.unquote(match.group(1))
+            if clean_url not in seen:
+                seen.add(clean_url)
+                watch_links.append({'icon': icon, 'url': clean_url})
+
+    return watch_links if watch_links else ["No watch links available"]
+
+
+def parse_category_page(html: str, backend: str = "html.parser"):
+    soup = BeautifulSoup(html, backend)
+
+    movies = []
+    for card in _CATEGORY_CARD.select(soup):
+        release_date = _CATEGORY_RELEASE_DATE.select_one(card)
+        poster = _IMG.select_one(card)
+        anchor = _ANCHOR.select_one(card)
+        movie_link = anchor["href"] if anchor else None
+        movies.append({
+            "title": _text(_H2.select_one(card), "Unknown"),
+            "release_date": release_date.text if release_date else "Unknown",
+            "poster": poster["src"] if poster else "No poster available",
+            "url": f"{TMDB_BASE_URL}{movie_link}" if movie_link else "No URL available",
+        })
+
+    return movies
@@ -0,0 +1,161 @@
+import asyncio
+import time
+import orjson
+from fastapi import HTTPException
+from .scraper import fetch_all_movies_by_category, fetch_movies_from_page, POPULAR_URL, TOP_RATED_URL, UPCOMING_URL
+from .cache import category_cache
+from .config import settings
+from .http_cache import make_etag
+
+CATEGORY_URLS = {
+    "popular": POPULAR_URL,
+    "top-rated": TOP_RATED_URL,
+    "upcoming": UPCOMING_URL,
+}
+
+
+class CategorySnapshot:
+    """A category listing with its response body pre-encoded once."""
+
+    def __init__(self, movies: list, refreshed_at: float, page_sizes: list | None = None):
+        self.movies = movies
+        self.refreshed_at = refreshed_at
+        self.body = orjson.dumps({"movies": movies})
+        self.etag = make_etag(self.body)
+        # Start offset of every listing page inside `movies`; entries cached
+        # before page sizes were recorded are treated as a single page
+        self._offsets = [0]
+        for size in page_sizes or [len(movies)]:
+            self._offsets.append(self._offsets[-1] + size)
+
+    def age(self):
+        return time.time() - self.refreshed_at
+
+    def page(self, page: int):
+        if page >= len(self._offsets):
+            return []
+        return self.movies[self._offsets[page - 1]:self._offsets[page]]
+
+    def page_range_etag(self, first: int, count: int):
+        # Derived from the snapshot's, so a 304 for a page range never encodes the range
+        return f'{self.etag[:-1]}.{first}.{count}"'
+
+    def page_range_body(self, first: int, count: int):
+        last = min(first + count, len(self._offsets))
+        if first >= last:
+            return orjson.dumps({"movies": []})
+        return orjson.dumps({"movies": self.movies[self._offsets[first - 1]:self._offsets[last - 1]]})
+
+
+async def stream_category_pages(category: str, first: int, count: int):
+    """Yield (page, movies) for the requested listing pages as soon as each one is available.
+
+    Served from the snapshot when there is one; otherwise every page is
+    scraped concurrently and yielded in completion order, so the first rows
+    go out after the fastest page rather than the slowest. A page that fails
+    is yielded as (page, exception).
+    """
+    snapshot = category_refresher.snapshot(category)
+    if snapshot is not None:
+        for page in range(first, first + count):
+            yield page, snapshot.page(page)
+        return
+
+    url = CATEGORY_URLS[category]
+
+    async def fetch(page):
+        try:
+            return page, await fetch_movies_from_page(page, url)
+        except Exception as e:
+            return page, e
+
+    tasks = [asyncio.create_task(fetch(page)) for page in range(first, first + count)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away mid-stream
+        for task in tasks:
+            task.cancel()
+
+
+class CategoryRefresher:
+    """Keeps the popular / top-rated / upcoming listings scraped ahead of requests.
+
+    A background task started from the app lifespan re-scrapes every category
+    each CATEGORY_REFRESH_INTERVAL seconds. If a refresh fails, even for a
+    single listing page, the previous snapshot keeps being served
+    (stale-while-revalidate) until the next complete run replaces it.
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._snapshots: dict[str, CategorySnapshot] = {}
+        self._task: asyncio.Task | None = None
+
+    def snapshot(self, category: str):
+        """The category's snapshot, or None when there is none or it has to be reloaded.
+
+        While the background task runs it replaces snapshots itself, and a
+        stale one is better than none; without it a snapshot only lives for
+        CACHE_TTL_CATEGORY, like the scrape cache entry it was built from.
+        """
+        snapshot = self._snapshots.get(category)
+        if snapshot is not None and self._task is None and snapshot.age() > settings.CACHE_TTL_CATEGORY:
+            return None
+        return snapshot
+
+    def _store(self, category, data):
+        snapshot = CategorySnapshot(data["movies"], time.time(), data.get("page_sizes"))
+        self._snapshots[category] = snapshot
+        return snapshot
+
+    async def load(self, category: str):
+        """Cold path: build the snapshot from the scrape cache (or a live scrape)."""
+        url = CATEGORY_URLS[category]
+        # A listing with failed pages is served, but not kept in the scrape cache for the full TTL
+        data = await category_cache.get_or_fetch(
+            url, lambda: fetch_all_movies_by_category(url), cacheable=lambda data: not data.get("failed_pages")
+        )
+        return self._store(category, data)
+
+    async def refresh(self, category: str):
+        url = CATEGORY_URLS[category]
+        data = await fetch_all_movies_by_category(url)
+        if data["failed_pages"]:
+            if category in self._snapshots:
+                raise RuntimeError(f"pages {data['failed_pages']} failed")
+            # Nothing to fall back on yet: serve the partial listing until the next run replaces it
+            return self._store(category, data)
+        await category_cache.set(url, data)
+        return self._store(category, data)
+
+    async def refresh_all(self):
+        results = await asyncio.gather(
+            *(self.refresh(category) for category in CATEGORY_URLS), return_exceptions=True
+        )
+        for category, result in zip(CATEGORY_URLS, results):
+            if isinstance(result, Exception):
+                detail = result.detail if isinstance(result, HTTPException) else result
+                print(f"Refreshing '{category}' failed, keeping previous snapshot: {detail}")
+
+    async def _run(self):
+        while True:
+            await self.refresh_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+category_refresher = CategoryRefresher(settings.CATEGORY_REFRESH_INTERVAL)
@@ -0,0 +1,141 @@
+"""Per-client rate limits for the routes that cost us upstream calls, bcrypt or SMTP.
+
+Each budget is a sliding-window counter: the count of the current fixed
+window plus the previous window's count, weighted by how much of that
+window still overlaps the last `window` seconds. That is three numbers per
+client and budget (instead of a log of timestamps) and stays within a few
+percent of an exact sliding window.
+
+A client is the user named by a valid bearer token, otherwise the client
+IP. The memory backend keeps the counters per process in a bounded LRU;
+the mongo backend keeps one `rate_limits` document per window so a budget
+holds across every worker.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fastapi import Depends, HTTPException, Request, status
+from pymongo import ReturnDocument
+from .config import settings
+from .models import RateLimitWindow
+from .OAuth2 import get_optional_claims
+
+PERIODS = {"second": 1, "minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+
+
+def parse_rate(rate: str):
+    """"30/minute" -> (30, 60)."""
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period.strip()]
+
+
+def _estimate(previous: int, current: int, window: int, elapsed: float):
+    return previous * (window - elapsed) / window + current
+
+
+def _retry_after(previous: int, current: int, limit: int, window: int, elapsed: float):
+    """Whole seconds until one more request fits, assuming the client stays quiet meanwhile."""
+    if current + 1 > limit:
+        # Only the next window helps, once this window's count has decayed enough
+        wait = window - elapsed + window * max(0.0, 1 - (limit - 1) / max(current, 1))
+    else:
+        wait = window * (1 - (limit - current - 1) / previous) - elapsed
+    return max(1, math.ceil(wait))
+
+
+class MemoryBackend:
+    """Counters of this process only; the least recently seen clients are dropped past `max_keys`."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [window number, count in it, count in the window before]
+        self._windows: OrderedDict[str, list] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: int):
+        """Count one request; returns None when allowed, else the Retry-After seconds."""
+        now = time.time()
+        number, elapsed = int(now // window), now % window
+        entry = self._windows.get(key)
+        if entry is None:
+            entry = self._windows[key] = [number, 0, 0]
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+            if entry[0] != number:
+                entry[2] = entry[1] if entry[0] == number - 1 else 0
+                entry[0], entry[1] = number, 0
+
+        _, current, previous = entry
+        if _estimate(previous, current + 1, window, elapsed) > limit:
+            return _retry_after(previous, current, limit, window, elapsed)
+        entry[1] += 1
+        return None
+
+
+class MongoBackend:
+    """Counters shared by every worker through the `rate_limits` collection.
+
+    Requests are counted before the check (one atomic $inc), so rejected ones
+    count too and a client that keeps hammering stays limited.
+    """
+
+    async def hit(self, key: str, limit: int, window: int):
+        now = time.time()
+        number, elapsed = int(now // window), now % window
+        collection = RateLimitWindow.get_motor_collection()
+        counted, before = await asyncio.gather(
+            collection.find_one_and_update(
+                {"key": f"{key}:{number}"},
+                # Kept until the window stops being the "previous" one
+                {"$inc": {"hits": 1},
+                 "$setOnInsert": {"expires_at": datetime.fromtimestamp((number + 2) * window, timezone.utc)}},
+                projection={"hits": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            ),
+            collection.find_one({"key": f"{key}:{number - 1}"}, {"hits": 1}),
+        )
+        current, previous = counted["hits"], before["hits"] if before else 0
+        if _estimate(previous, current, window, elapsed) > limit:
+            return _retry_after(previous, current - 1, limit, window, elapsed)
+        return None
+
+
+backend = MongoBackend() if settings.RATE_LIMIT_BACKEND == "mongo" else MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def client_key(request: Request, claims):
+    if claims is not None:
+        return f"user:{claims.id}"
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(name: str, rate: str):
+    """Route dependency enforcing the budget `rate` ("30/minute") per client, e.g.
+    `@router.get(..., dependencies=[rate_limit("search", settings.RATE_LIMIT_SEARCH)])`."""
+    limit, window = parse_rate(rate)
+
+    async def check(request: Request, claims=Depends(get_optional_claims)):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        try:
+            retry_after = await backend.hit(f"{name}:{client_key(request, claims)}", limit, window)
+        except Exception as e:
+            # Never turn a counter outage into an API outage
+            print(f"Rate limit check failed, letting the request through: {e}")
+            return
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(retry_after), "X-RateLimit-Limit": rate},
+            )
+
+    return Depends(check)
@@ -3,20 +3,30 @@ from fastapi import APIRouter, Depends, status, HTTPException
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from ..schemas import Token
 from ..models import User
-from ..utils import verify
+from ..utils import verify_and_update_async
 from ..OAuth2 import create_access_token
+from ..ratelimit import rate_limit
+from ..config import settings
 
 router = APIRouter(
     prefix="/logins",
     tags=["Authentication"]
 )
 
-@router.post("/token", status_code=status.HTTP_200_OK, response_model=Token)
+@router.post("/token", status_code=status.HTTP_200_OK, response_model=Token,
+             dependencies=[rate_limit("login", settings.RATE_LIMIT_LOGIN)])
 async def login(user_cred: Annotated[OAuth2PasswordRequestForm, Depends()]):
     user = await User.find_one(User.email == user_cred.username)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid credentials. Please try again!")
 
-    if not user or not verify(user_cred.password, user.password):
+    valid, new_hash = await verify_and_update_async(user_cred.password, user.password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid credentials. Please try again!")
 
+    if new_hash:
+        # Stored hash used an outdated cost factor
+        await user.set({User.password: new_hash})
+
     access_token = create_access_token(data={"id": str(user.id), "email": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, status,  BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, Header
 from fastapi.responses import RedirectResponse
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from ..schemas import ForgotEmail, ResetPassword
-from ..mailer import mail, create_message
+from ..mail_queue import enqueue_mail
 from ..models import User
-from ..utils import hash as hash_password
+from ..utils import hash_async
+from ..OAuth2 import invalidate_user
+from ..ratelimit import rate_limit
+from ..config import settings
 import secrets
 
 router = APIRouter(tags=['forgot_password'])
@@ -13,11 +16,16 @@ router = APIRouter(tags=['forgot_password'])
 SECRET_KEY = secrets.token_hex(32)
 serializer = URLSafeTimedSerializer(SECRET_KEY)
 
-@router.post("/forgot_val")
-async def send_reset_email(
-    emails: ForgotEmail, 
-    background_tasks: BackgroundTasks
-):
+def _preferred_locale(accept_language: str | None):
+    # First tag of e.g. "pt-BR,pt;q=0.9,en;q=0.8"; the template lookup handles fallbacks
+    if not accept_language:
+        return None
+    tag = accept_language.split(",")[0].split(";")[0].strip()
+    return tag if tag and tag != "*" else None
+
+
+@router.post("/forgot_val", dependencies=[rate_limit("password_reset", settings.RATE_LIMIT_PASSWORD_RESET)])
+async def send_reset_email(emails: ForgotEmail, accept_language: str | None = Header(None)):
     user = await User.find_one(User.email == emails.email)
  
     if not user:
@@ -27,35 +35,20 @@ async def send_reset_email(
         # Generate a reset token valid for 1 hour
         token = serializer.dumps(user.email, salt="password-reset-salt")
         reset_url = f"https://cineflx.netlify.app/reset-password?token={token}"
-        html = f"""
-        <p>Hello {user.name},</p>
-        <p>Click the link below to reset your password:</p>
-        <a href="{reset_url}">RESET URL</a>
-        <p>This link will expire in 1 hour.</p>
-        <h3>Happy Day !!!</h3>
-        """
-        subject = "Password Reset Request"
 
-        # Use BackgroundTasks to send the email
-        background_tasks.add_task(
-            send_email_task,
+        # Queued; the mail worker renders templates/email/<locale>/password_reset.* and sends it
+        await enqueue_mail(
             recipients=[emails.email],
-            subject=subject,
-            body=html
+            template="password_reset",
+            context={"name": user.name, "reset_url": reset_url, "expires_in": "1 hour"},
+            locale=_preferred_locale(accept_language),
         )
 
         return {"message": "Password reset link has been sent to your email!"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to send email: {e}")
 
-async def send_email_task(recipients: list, subject: str, body: str):
-    """Background task to send an email."""
-    message = create_message(recipients=recipients, subject=subject, body=body)
-   
-    await mail.send_message(message)
-
-
-@router.post("/reset-password")
+@router.post("/reset-password", dependencies=[rate_limit("password_reset", settings.RATE_LIMIT_PASSWORD_RESET)])
 async def reset_password(data: ResetPassword):
     try:
         email = serializer.loads(data.token, salt="password-reset-salt", max_age=3600)  # 1 hour
@@ -64,9 +57,10 @@ async def reset_password(data: ResetPassword):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
 
         # Hash the new password and save it
-        user.password = hash_password(data.new_password)
+        user.password = await hash_async(data.new_password)
         
         await user.save()
+        invalidate_user(user.email)
         return {"message": "Password has been reset successfully!"}
     except (BadSignature, SignatureExpired):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token.")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..metrics import histograms, render_gauge, loop_lag_monitor
+from ..cache import cache_stats
+from ..http_client import get_governor
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    lines = []
+    for histogram in histograms:
+        lines.extend(histogram.render())
+
+    stats = cache_stats()
+    for field, help in [
+        ("hits", "Lookups served from the in-process cache."),
+        ("l2_hits", "Lookups served from the MongoDB cache tier."),
+        ("misses", "Lookups that had to fetch from upstream."),
+        ("stale", "Lookups served past their TTL because the fetch failed."),
+        ("coalesced", "Lookups that waited on an identical in-flight fetch."),
+        ("hit_ratio", "Share of lookups served from either cache tier."),
+    ]:
+        lines.extend(render_gauge(
+            f"cineflix_cache_{field}", help,
+            [({"cache": namespace}, values[field]) for namespace, values in stats.items()],
+        ))
+
+    lines.extend(render_gauge(
+        "cineflix_event_loop_lag_last_seconds", "Lag measured by the most recent probe.",
+        [({}, loop_lag_monitor.last)],
+    ))
+
+    governor = get_governor()
+    if governor is not None:
+        lines.extend(render_gauge(
+            "cineflix_upstream_circuit_open", "1 while requests to the host fail fast.",
+            [({"host": host}, int(state == "open")) for host, state in governor.breaker_states().items()],
+        ))
+
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
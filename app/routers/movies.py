@@ -1,41 +1,74 @@
-import asyncio
-from typing import List
-from fastapi.responses import  ORJSONResponse
+from typing import List, Literal
+from fastapi.responses import  ORJSONResponse, StreamingResponse
 import httpx
-import requests
-from fastapi import APIRouter, HTTPException, Response, Depends,status
-from ..scraper import fetch_movie_list, get_movie_details,fetch_movies_from_page
+import orjson
+from fastapi import APIRouter, HTTPException, Depends,status, Response, Query, Request
+from ..scraper import fetch_movie_list, get_movie_details, MAX_PAGES
+from ..trailers import find_trailer, prefetch_trailer, QuotaExhausted
+from ..cache import search_cache, details_cache
+from ..precompute import category_refresher, stream_category_pages
+from ..singleflight import normalize_url, normalize_query
 from ..schemas import MovieBasic, MovieDetails
-from ..OAuth2 import get_current_user
+from ..OAuth2 import get_current_claims
+from ..ratelimit import rate_limit
 from ..config import settings
+from ..http_cache import etag_matches, not_modified, set_validators
 
 router = APIRouter(prefix="/movies", tags=["movies"])
 
+DETAILS_FIELDS = tuple(MovieDetails.model_fields)
 
-@router.get("/search/{movie_name}", response_model=List[MovieBasic])
-def search_movies(movie_name: str, response: Response, user=Depends(get_current_user)):
-    movies = fetch_movie_list(movie_name, response)
+
+# Search and details serve trusted dicts from the scrape cache; their response_model only
+# documents the shape, the ORJSONResponse skips re-validating every field on each request.
+@router.get("/search/{movie_name}", response_model=List[MovieBasic],
+            dependencies=[rate_limit("search", settings.RATE_LIMIT_SEARCH)])
+async def search_movies(movie_name: str, user=Depends(get_current_claims)):
+    movies = await search_cache.get_or_fetch(
+        normalize_query(movie_name), lambda: fetch_movie_list(movie_name), cacheable=bool
+    )
     if not movies:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail= f"No movies found for '{movie_name}'")
 
-    return ORJSONResponse(movies)
+    return ORJSONResponse(movies, headers={"Cache-Control": settings.CACHE_CONTROL_SEARCH})
+
+
+async def _fetch_details(movie_url):
+    details = await get_movie_details(movie_url)
+    # First request for this movie: resolve its trailer while the user reads the page
+    prefetch_trailer(details.get("title"))
+    return details
 
 
-@router.get("/details/", response_model=List[MovieDetails])
-def get_movie_full_details(movie_url: str, user=Depends(get_current_user)):
+def _cacheable_details(details):
+    # Errors, and the placeholder returned when the page did not parse (it has no title), are
+    # retried on the next request instead of being pinned for CACHE_TTL_DETAILS
+    return "error" not in details and details.get("title") is not None
+
+
+@router.get("/details/", response_model=MovieDetails,
+            dependencies=[rate_limit("details", settings.RATE_LIMIT_DETAILS)])
+async def get_movie_full_details(movie_url: str, user=Depends(get_current_claims)):
     
     if not movie_url.startswith("https://www.themoviedb.org/movie/"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid movie URL")
 
     try:
-        details = get_movie_details(movie_url)
-        movies = MovieDetails(**details)
-        return ORJSONResponse(content=movies.model_dump(), status_code=200)
-
-    except requests.Timeout:
+        details = await details_cache.get_or_fetch(
+            normalize_url(movie_url), lambda: _fetch_details(movie_url), cacheable=_cacheable_details
+        )
+        if "error" in details:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=details["error"])
+        return ORJSONResponse(content={field: details.get(field) for field in DETAILS_FIELDS}, status_code=200,
+                              headers={"Cache-Control": settings.CACHE_CONTROL_DETAILS})
+
+    except HTTPException as e:
+        raise e
+
+    except httpx.TimeoutException:
         raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Request to TMDB timed out")
 
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Error fetching movie details: {str(e)}")
 
     except Exception as e:
@@ -46,77 +79,89 @@ def get_movie_full_details(movie_url: str, user=Depends(get_current_user)):
 
 
 
-async def get_trailer_from_youtube(movie_name: str):
-    search_query = f"{movie_name} official trailer"
-
-    params = {
-        "q": search_query,
-        "part": "snippet",
-        "maxResults": 1,
-        "type": "video",
-        "key": settings.YOUTUBE_API_KEY,  
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(settings.YOUTUBE_API_URL, params=params)
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail="YouTube API request failed")
-
-        data = response.json() 
-
-        if "items" in data and data["items"]:
-            video_id = data["items"][0]["id"]["videoId"]
-            return f"https://www.youtube.com/watch?v={video_id}"
-
-    return None
-
-@router.get("/trailer/{movie_name}")
-async def get_movie_trailer(movie_name: str, user=Depends(get_current_user)):
-   
-    trailer_url = await get_trailer_from_youtube(movie_name)
+@router.get("/trailer/{movie_name}", dependencies=[rate_limit("details", settings.RATE_LIMIT_DETAILS)])
+async def get_movie_trailer(movie_name: str, response: Response, year: str | None = None, user=Depends(get_current_claims)):
+    try:
+        trailer_url = await find_trailer(movie_name, year)
+    except QuotaExhausted as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Trailer lookups are unavailable until the YouTube quota resets",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"YouTube API request failed: {str(e)}")
 
     if trailer_url:
+        response.headers["Cache-Control"] = settings.CACHE_CONTROL_TRAILER
         return {"movie_name": movie_name, "trailer_url": trailer_url}
     
     raise HTTPException(status_code=404, detail="Trailer not found.")
 
 
-POPULAR_URL = "https://www.themoviedb.org/movie"
-TOP_RATED_URL = "https://www.themoviedb.org/movie/top-rated"
-UPCOMING_URL = "https://www.themoviedb.org/movie/upcoming"
-MAX_PAGES = 10 
-
-async def fetch_all_movies_by_category(base_url):
-
-    try:
-        async with httpx.AsyncClient() as client:
-            tasks = [fetch_movies_from_page(client, page, base_url) for page in range(1, MAX_PAGES + 1)]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        all_movies = []
-        for result in results:
-            if isinstance(result, Exception):
-                print(f"Skipping failed request: {result}")  
-                continue
-            all_movies.extend(result)
-
-        if not all_movies:
-            raise HTTPException(status_code=404, detail="No movies found")
-
-        return {"movies": all_movies}
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
-
-@router.get("/popular")
-async def fetch_popular_movies(user=Depends(get_current_user)):
-    return await fetch_all_movies_by_category(POPULAR_URL)
-
-@router.get("/top-rated")
-async def fetch_top_rated_movies(user=Depends(get_current_user)):
-    return await fetch_all_movies_by_category(TOP_RATED_URL)
-
-@router.get("/upcoming")
-async def fetch_upcoming_movies(user=Depends(get_current_user)):
-    return await fetch_all_movies_by_category(UPCOMING_URL)
+class CategoryPages:
+    """Query parameters shared by the category listings.
+
+    Without page / pages the whole listing is returned as before; page alone
+    selects one listing page, pages alone the first N. stream=ndjson|sse
+    sends one chunk per listing page as soon as it is available.
+    """
+
+    def __init__(
+        self,
+        page: int | None = Query(None, ge=1, le=MAX_PAGES),
+        pages: int | None = Query(None, ge=1, le=MAX_PAGES),
+        stream: Literal["ndjson", "sse"] | None = None,
+    ):
+        self.first = page or 1
+        self.count = pages or (1 if page else MAX_PAGES)
+        self.count = min(self.count, MAX_PAGES - self.first + 1)
+        self.whole = page is None and pages is None
+        self.stream = stream
+
+
+def _page_chunk(page, movies):
+    if isinstance(movies, Exception):
+        detail = movies.detail if isinstance(movies, HTTPException) else str(movies)
+        return {"page": page, "movies": [], "error": detail}
+    return {"page": page, "movies": movies}
+
+
+async def _ndjson(chunks):
+    async for page, movies in chunks:
+        yield orjson.dumps(_page_chunk(page, movies)) + b"\n"
+
+
+async def _sse(chunks):
+    async for page, movies in chunks:
+        yield b"event: page\ndata: " + orjson.dumps(_page_chunk(page, movies)) + b"\n\n"
+    yield b"event: end\ndata: {}\n\n"
+
+
+async def serve_category(category, params: CategoryPages, request: Request):
+    if params.stream:
+        chunks = stream_category_pages(category, params.first, params.count)
+        if params.stream == "sse":
+            return StreamingResponse(_sse(chunks), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+        return StreamingResponse(_ndjson(chunks), media_type="application/x-ndjson")
+
+    snapshot = category_refresher.snapshot(category) or await category_refresher.load(category)
+    etag = snapshot.etag if params.whole else snapshot.page_range_etag(params.first, params.count)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.CACHE_CONTROL_CATEGORY)
+    body = snapshot.body if params.whole else snapshot.page_range_body(params.first, params.count)
+    response = Response(content=body, media_type="application/json")
+    set_validators(response, etag, settings.CACHE_CONTROL_CATEGORY)
+    return response
+
+@router.get("/popular", dependencies=[rate_limit("category", settings.RATE_LIMIT_CATEGORY)])
+async def fetch_popular_movies(request: Request, params: CategoryPages = Depends(), user=Depends(get_current_claims)):
+    return await serve_category("popular", params, request)
+
+@router.get("/top-rated", dependencies=[rate_limit("category", settings.RATE_LIMIT_CATEGORY)])
+async def fetch_top_rated_movies(request: Request, params: CategoryPages = Depends(), user=Depends(get_current_claims)):
+    return await serve_category("top-rated", params, request)
+
+@router.get("/upcoming", dependencies=[rate_limit("category", settings.RATE_LIMIT_CATEGORY)])
+async def fetch_upcoming_movies(request: Request, params: CategoryPages = Depends(), user=Depends(get_current_claims)):
+    return await serve_category("upcoming", params, request)
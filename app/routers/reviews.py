@@ -1,108 +1,99 @@
 
-from fastapi import APIRouter,status,HTTPException,Depends
-from ..schemas import ReviewCreateModel,ReviewResponseModel,ReviewEditModel,ReviewItemResponseModel, UserResponseModel
-from ..OAuth2 import get_current_user
-from ..models import Review,ReviewItem, User
-from ..schemas import ReviewResponseModel
+from typing import Literal
+from fastapi import APIRouter,status,HTTPException,Depends,Query,Request
+from fastapi.responses import ORJSONResponse
+from beanie import UpdateResponse
+from beanie.operators import In, Inc, Set
+from pymongo.errors import DuplicateKeyError
+from ..schemas import ReviewCreateModel,ReviewResponseModel,ReviewEditModel, ReviewItemProjection, UserProjection
+from ..OAuth2 import get_current_user, get_current_claims
+from ..models import Review,ReviewItem, User, REVIEW_SORTS
+from ..pagination import encode_cursor, decode_cursor, keyset_filter
+from ..ratelimit import rate_limit
+from ..config import settings
+from ..http_cache import make_etag, etag_matches, not_modified, set_validators
 
 
 router=APIRouter(prefix="/review",tags=['review'])
 
-@router.post("/addReview", status_code=status.HTTP_201_CREATED)
+
+def _movie_reviews(movie_name, release_date):
+    return ReviewItem.find(ReviewItem.movie_name == movie_name, ReviewItem.release_date == release_date)
+
+
+async def _adjust_rating(movie_name, release_date, rating_delta, count_delta):
+    """Atomically apply a rating change to the movie summary and return the updated summary.
+
+    Every review write goes through here (edits with a zero delta too), so it
+    also bumps the summary's version, invalidating the movie's review page ETags.
+    """
+    # A plain equality filter (not $and) so an upsert seeds movie_name / release_date
+    return await Review.find_one({"movie_name": movie_name, "release_date": release_date}).update(
+        Inc({Review.rating_sum: rating_delta, Review.rating_count: count_delta, Review.version: 1}),
+        upsert=count_delta > 0,
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
+
+
+@router.post("/addReview", status_code=status.HTTP_201_CREATED,
+             dependencies=[rate_limit("review_write", settings.RATE_LIMIT_REVIEW_WRITE)])
 async def add_review(review: ReviewCreateModel, user=Depends(get_current_user)):
     try:
-        
-        existing_movie = await Review.find_one(Review.movie_name == review.movie_name)
-
-      
         new_review = ReviewItem(
+            movie_name=review.movie_name,
+            release_date=review.release_date,
             review_content=review.review_content,
             rating=review.rating,
-            created_by=user, 
+            created_by=user.id,
         )
 
-        if existing_movie:
-         
-            user_review = next((r for r in existing_movie.reviews if r.created_by.id == user.id), None)
-            if user_review:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="You have already submitted a review for this movie."
-                )
-
-          
-            existing_movie.reviews.append(new_review)
-
-            
-            total_ratings = sum(r.rating for r in existing_movie.reviews)
-            existing_movie.overall_rating = total_ratings / len(existing_movie.reviews)
-
-            await existing_movie.save()
-
-           
-            return {
-                "Success": "Review added successfully",
-                "overall_rating": round(existing_movie.overall_rating, 2)
-            }
-
-        else:
-          
-            new_movie = Review(
-                movie_name=review.movie_name,
-                release_date=review.release_date,
-                overall_rating=review.rating, 
-                reviews=[new_review],
+        try:
+            await new_review.insert()
+        except DuplicateKeyError:
+            # (movie_name, release_date, created_by) is unique
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already submitted a review for this movie."
             )
 
-            await new_movie.insert()
-
-           
-            return {
-                "Success": "Review added successfully",
-                "overall_rating": round(new_movie.overall_rating, 2)
-            }
+        summary = await _adjust_rating(review.movie_name, review.release_date, review.rating, 1)
+        return {
+            "Success": "Review added successfully",
+            "overall_rating": summary.overall_rating
+        }
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         error = f"Review adding failed: {str(e)}"
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error)
 
 
-@router.put("/editReview/{movie_name}/{release_date}", status_code=status.HTTP_200_OK)
-async def edit_review(movie_name: str,release_date:str, review_update: ReviewEditModel, user=Depends(get_current_user)):
- 
-    try:
-        existing_movie = await Review.find_one(Review.movie_name == movie_name,Review.release_date==release_date)
-
-        if not existing_movie:
-            raise HTTPException(status_code=404, detail="Movie not found.")
-
-     
-        for review in existing_movie.reviews:
-            if review.created_by.id == user.id:
-                review.review_content = review_update.review_content
-                review.rating = review_update.rating
-                break
-            else:
-                raise HTTPException(status_code=400, detail="You have not reviewed this movie.")
-            
-            
-        total_ratings = sum(rev.rating for rev in existing_movie.reviews)
-        existing_movie.overall_rating = round(total_ratings / len(existing_movie.reviews), 2)
-        await existing_movie.save()
+@router.put("/editReview/{movie_name}/{release_date}", status_code=status.HTTP_200_OK,
+            dependencies=[rate_limit("review_write", settings.RATE_LIMIT_REVIEW_WRITE)])
+async def edit_review(movie_name: str,release_date:str, review_update: ReviewEditModel, user=Depends(get_current_claims)):
 
+    try:
+        previous = await ReviewItem.find_one(
+            ReviewItem.movie_name == movie_name,
+            ReviewItem.release_date == release_date,
+            ReviewItem.created_by == user.id,
+        ).update(Set({
+            ReviewItem.review_content: review_update.review_content,
+            ReviewItem.rating: review_update.rating,
+        }), response_type=UpdateResponse.OLD_DOCUMENT)
+
+        if not previous:
+            if not await Review.find_one(Review.movie_name == movie_name, Review.release_date == release_date):
+                raise HTTPException(status_code=404, detail="Movie not found.")
+            raise HTTPException(status_code=400, detail="You have not reviewed this movie.")
+
+        summary = await _adjust_rating(movie_name, release_date, review_update.rating - previous.rating, 0)
         return {
             "movie_name": movie_name,
             "updated_review_content": review_update.review_content,
-            "overall_rating": round(existing_movie.overall_rating, 2)
+            "overall_rating": summary.overall_rating if summary else review_update.rating
         }
-    
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Review update failed: {str(e)}")
-
-
-        
 
     except HTTPException as e:
         raise e
@@ -111,41 +102,41 @@ async def edit_review(movie_name: str,release_date:str, review_update: ReviewEdi
 
 
 
-@router.delete("/deleteReview/{movie_name}/{release_date}", status_code=status.HTTP_200_OK)
-async def delete_review(movie_name: str,release_date:str, user=Depends(get_current_user)):
+@router.delete("/deleteReview/{movie_name}/{release_date}", status_code=status.HTTP_200_OK,
+               dependencies=[rate_limit("review_write", settings.RATE_LIMIT_REVIEW_WRITE)])
+async def delete_review(movie_name: str,release_date:str, user=Depends(get_current_claims)):
     try:
-        existing_movie = await Review.find_one(Review.movie_name == movie_name,Review.release_date==release_date)
-        if not existing_movie:
-            raise HTTPException(status_code=404, detail="Movie not found")
-
-    
-        user_review = None
-        for review in existing_movie.reviews: 
-            if review.created_by.id == user.id:
-                user_review = review
-                break
+        deleted = await ReviewItem.get_motor_collection().find_one_and_delete({
+            "movie_name": movie_name,
+            "release_date": release_date,
+            "created_by": user.id,
+        })
 
-        if not user_review:
+        if not deleted:
+            if not await Review.find_one(Review.movie_name == movie_name, Review.release_date == release_date):
+                raise HTTPException(status_code=404, detail="Movie not found")
             raise HTTPException(
                 status_code=404, detail="User has not reviewed this movie"
             )
 
-        existing_movie.reviews.remove(user_review)
+        summary = await _adjust_rating(movie_name, release_date, -deleted["rating"], -1)
 
-        if not existing_movie.reviews:
-            await existing_movie.delete()
+        if not summary or summary.rating_count <= 0:
+            # Conditional so a review added concurrently keeps its summary
+            await Review.get_motor_collection().delete_one({
+                "movie_name": movie_name,
+                "release_date": release_date,
+                "rating_count": {"$lte": 0},
+            })
             return {"message": "Review and movie deleted successfully","overall_rating":"0"}
 
-     
-        total_ratings = sum(rev.rating for rev in existing_movie.reviews)
-        existing_movie.overall_rating = round(total_ratings / len(existing_movie.reviews), 2)
-
-        await existing_movie.save()
         return {
             "message": "Review deleted successfully",
-            "overall_rating": existing_movie.overall_rating
+            "overall_rating": summary.overall_rating
         }
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to delete review: {str(e)}"
@@ -153,43 +144,76 @@ async def delete_review(movie_name: str,release_date:str, user=Depends(get_curre
 
 
 @router.get("/getReviews/{movie_name}/{release_date}", response_model=ReviewResponseModel, status_code=status.HTTP_200_OK)
-async def get_reviews(movie_name: str,release_date:str,user=Depends(get_current_user)):
+async def get_reviews(
+    movie_name: str,
+    release_date: str,
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    sort: Literal["newest", "highest", "lowest"] = "newest",
+    user=Depends(get_current_claims),
+):
     try:
         existing_movie = await Review.find_one(Review.movie_name == movie_name, Review.release_date==release_date)
         if not existing_movie:
             raise HTTPException(status_code=404, detail="Movie not found")
 
-        overall_rating = (
-            round(sum(rev.rating for rev in existing_movie.reviews) / len(existing_movie.reviews), 2)
-            if existing_movie.reviews else 0
-        )
+        # The summary's version changes with every review write, so it identifies the page
+        etag = make_etag(f"{existing_movie.id}:{existing_movie.version}:{sort}:{limit}:{cursor}".encode())
+        if etag_matches(request, etag):
+            return not_modified(etag, settings.CACHE_CONTROL_REVIEWS)
+
+        keys = REVIEW_SORTS[sort]
+        query = _movie_reviews(movie_name, release_date)
+        if cursor:
+            query = query.find(keyset_filter(keys, decode_cursor(cursor, len(keys))))
+
+        # One extra row tells us whether another page exists
+        page = await query.sort(keys).limit(limit + 1).project(ReviewItemProjection).to_list()
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            next_cursor = encode_cursor([getattr(last, "id" if field == "_id" else field) for field, _ in keys])
+
+        # Resolve every reviewer with a single $in query instead of one lookup per review
+        user_ids = list({rev.created_by for rev in page})
+        users = await User.find(In(User.id, user_ids)).project(UserProjection).to_list()
+        users_by_id = {
+            user_data.id: {"id": str(user_data.id), "name": user_data.name,
+                           "email": user_data.email, "created_at": user_data.created_at}
+            for user_data in users
+        }
 
+        # Plain dicts in the ReviewResponseModel shape: the projections above were already
+        # validated on load, so the page is serialized once by orjson instead of re-validated
         reviews_with_users = []
-        for rev in existing_movie.reviews:
-            user_data = await User.find_one(User.id == rev.created_by.id) 
+        for rev in page:
+            user_data = users_by_id.get(rev.created_by)
             if not user_data:
-                raise HTTPException(status_code=404, detail=f"User not found for review {rev.id}")
-
-            reviews_with_users.append(
-                ReviewItemResponseModel(
-                    review_content=rev.review_content,
-                    rating=rev.rating,
-                    created_by=UserResponseModel(  
-                        id=user_data.id,
-                        name=user_data.name,
-                        email=user_data.email,
-                        created_at=user_data.created_at
-                    ),
-                    created_at=rev.created_at
-                )
-            )
-
-        return ReviewResponseModel(
-            movie_name=existing_movie.movie_name,
-            release_date=existing_movie.release_date,
-            overall_rating=overall_rating,
-            reviews=reviews_with_users
-        )
+                # The author deleted their account; leave the review out rather than fail the page.
+                # next_cursor was taken from the unfiltered page, so paging is unaffected.
+                continue
+
+            reviews_with_users.append({
+                "review_content": rev.review_content,
+                "rating": rev.rating,
+                "created_by": user_data,
+                "created_at": rev.created_at,
+            })
+
+        response = ORJSONResponse({
+            "movie_name": existing_movie.movie_name,
+            "release_date": existing_movie.release_date,
+            "overall_rating": existing_movie.overall_rating,
+            "review_count": existing_movie.rating_count,
+            "reviews": reviews_with_users,
+            "next_cursor": next_cursor,
+        })
+        set_validators(response, etag, settings.CACHE_CONTROL_REVIEWS)
+        return response
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get reviews: {str(e)}")
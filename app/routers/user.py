@@ -1,20 +1,26 @@
-from fastapi import APIRouter,status,Depends,HTTPException,status
+import orjson
+from fastapi import APIRouter,status,Depends,HTTPException,status,Query
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from ..schemas import UserCreate,UserResponseModel
 from ..models import User
-from ..utils import hash
-from ..OAuth2 import get_current_user
+from ..pagination import encode_cursor, decode_cursor, keyset_filter
+from ..utils import hash_async
+from ..OAuth2 import get_current_claims, invalidate_user
+from ..ratelimit import rate_limit
+from ..config import settings
 
 
 
 router=APIRouter(prefix="/users",tags=['users'])
 
-@router.post("/createuser",status_code=status.HTTP_201_CREATED)
+@router.post("/createuser",status_code=status.HTTP_201_CREATED,
+             dependencies=[rate_limit("signup", settings.RATE_LIMIT_SIGNUP)])
 async def create_user(user:UserCreate):
     try:
         existing_user=await User.find_one(User.email==user.email)
         if existing_user:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="User already created")
-        user.password=hash(user.password)
+        user.password=await hash_async(user.password)
         new_user=User(**user.model_dump())
         await new_user.insert()
         return {"Success":"Signup successfull"}
@@ -23,18 +29,49 @@ async def create_user(user:UserCreate):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail=error)
 
 
+USER_KEYS = [("_id", 1)]
+USER_FIELDS = {"name": 1, "email": 1, "created_at": 1}
+
+
+def _public_user(doc: dict):
+    # A raw users document read with USER_FIELDS, in the UserResponseModel shape
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+async def _export_users(query: dict):
+    # Raw motor cursor: documents are read in batches and written out one line at a time
+    async for doc in User.get_motor_collection().find(query, USER_FIELDS).sort(USER_KEYS).batch_size(500):
+        yield orjson.dumps(_public_user(doc)) + b"\n"
+
+
 @router.get("/getallusers",response_model=list[UserResponseModel])
-async def get_all():
-    users=await User.find_all().to_list()
-    return users
+async def get_all(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    stream: bool = False,
+):
+    query = keyset_filter(USER_KEYS, decode_cursor(cursor, len(USER_KEYS))) if cursor else {}
+    if stream:
+        # Bulk export: every user from the cursor onwards as NDJSON, ignoring limit
+        return StreamingResponse(_export_users(query), media_type="application/x-ndjson")
+
+    # Same raw path as the export: the documents go straight to orjson, without a model per user
+    users = await User.get_motor_collection().find(query, USER_FIELDS).sort(USER_KEYS).limit(limit + 1).to_list(None)
+    headers = {}
+    if len(users) > limit:
+        users = users[:limit]
+        headers["X-Next-Cursor"] = encode_cursor([users[-1]["_id"]])
+    return ORJSONResponse([_public_user(doc) for doc in users], headers=headers)
 
 @router.delete("/deleteuser",status_code=status.HTTP_200_OK)
-async def delete_user(user=Depends(get_current_user)):
+async def delete_user(user=Depends(get_current_claims)):
     try:
         existing_user = await User.find_one(User.email == user.email)   
         if not existing_user:
             raise HTTPException(status_code=404, detail="User not found")
         await existing_user.delete()
+        invalidate_user(existing_user.email)
     except Exception as e:
         error=f"Deletion failed: {str(e)}"
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail=error)
@@ -16,6 +16,11 @@ class UserResponseModel(BaseModel):
     created_at:datetime 
 
 
+class UserProjection(UserResponseModel):
+    """Beanie projection for UserResponseModel: only these fields are read from MongoDB."""
+    id: PydanticObjectId = Field(alias="_id")
+
+
 class Token(BaseModel):
     access_token:str
     token_type:str
@@ -41,11 +46,21 @@ class ReviewItemResponseModel(BaseModel):
     created_by: UserResponseModel    # User ID reference
     created_at: datetime
 
+class ReviewItemProjection(BaseModel):
+    """Beanie projection for one page of reviews: the movie key is already known."""
+    id: PydanticObjectId = Field(alias="_id")
+    review_content: str
+    rating: float
+    created_by: PydanticObjectId
+    created_at: datetime
+
 class ReviewResponseModel(BaseModel):
     movie_name: str
     release_date: str
     overall_rating: float
+    review_count: int
     reviews: List[ReviewItemResponseModel]
+    next_cursor: str | None = None    # Pass back as ?cursor= for the next page
 
 
 
@@ -0,0 +1,56 @@
+import asyncio
+import urllib.parse
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task.
+
+    The first caller for a key starts `fn()`; callers arriving while it runs
+    await the same task and share its result or exception. The task is shielded
+    so a caller disconnecting does not cancel the fetch for everyone else.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key: str, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so it is not reported as unhandled when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+
+def normalize_url(url: str):
+    """Canonical form of a URL for use as a cache / single-flight key."""
+    parts = urllib.parse.urlsplit(url.strip())
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query)))
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path.rstrip("/") or "/",
+        query,
+        "",
+    ))
+
+
+def normalize_query(query: str):
+    """Canonical form of a free-text search query."""
+    return " ".join(query.split()).lower()
@@ -0,0 +1,168 @@
+"""YouTube trailer lookups.
+
+A YouTube search costs 100 of the API's 10,000 daily quota units, so results
+are cached for a long time (misses for a shorter one) on normalised title +
+year, and the units spent are counted per quota day in MongoDB so every
+worker stops searching before YouTube starts answering 403.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from fastapi import HTTPException
+from .cache import trailer_cache
+from .config import settings
+from .http_client import get_http_client
+from .models import ApiQuota
+from .singleflight import normalize_query
+
+# YouTube quota days start at midnight Pacific time
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+_QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded", "rateLimitExceeded"}
+
+
+class QuotaExhausted(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Quota exhausted, resets in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class QuotaTracker:
+    """Units spent on one metered API today, kept in the `api_quota` collection."""
+
+    def __init__(self, api: str, daily_limit: int):
+        self.api = api
+        self.daily_limit = daily_limit
+        self.used = 0  # last value seen in MongoDB, other workers included
+        self._day = None
+        self._exhausted = False
+
+    def _roll(self):
+        day = datetime.now(_QUOTA_TZ).date().isoformat()
+        if day != self._day:
+            self._day, self.used, self._exhausted = day, 0, False
+        return day
+
+    def remaining(self):
+        self._roll()
+        return 0 if self._exhausted else max(0, self.daily_limit - self.used)
+
+    def seconds_until_reset(self):
+        now = datetime.now(_QUOTA_TZ)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), _QUOTA_TZ)
+        return int((midnight - now).total_seconds()) + 1
+
+    def exhaust(self):
+        """The API reported the quota as spent, whatever our count says."""
+        self._roll()
+        self._exhausted = True
+
+    async def reserve(self, units: int):
+        """Atomically take `units` from today's quota; False when there is not enough left."""
+        day = self._roll()
+        if self._exhausted or self.used + units > self.daily_limit:
+            return False
+        try:
+            doc = await ApiQuota.get_motor_collection().find_one_and_update(
+                {"key": f"{self.api}:{day}", "used": {"$lte": self.daily_limit - units}},
+                {"$inc": {"used": units}, "$setOnInsert": {"expires_at": datetime.now(timezone.utc) + timedelta(days=2)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self.used = doc["used"]
+        except DuplicateKeyError:
+            # Today's counter exists but has no room left, so the upsert tried to create a second one
+            self._exhausted = True
+            return False
+        except Exception as e:
+            print(f"Quota tracking for {self.api} failed, counting locally: {e}")
+            self.used += units
+        return True
+
+
+youtube_quota = QuotaTracker("youtube-search", settings.YOUTUBE_DAILY_QUOTA)
+
+
+def _is_quota_error(response):
+    try:
+        errors = response.json()["error"]["errors"]
+    except Exception:
+        return False
+    return any(error.get("reason") in _QUOTA_REASONS for error in errors)
+
+
+async def _search_youtube(title: str, year: str | None):
+    if not await youtube_quota.reserve(settings.YOUTUBE_SEARCH_COST):
+        raise QuotaExhausted(youtube_quota.seconds_until_reset())
+
+    params = {
+        "q": f"{title} {year} official trailer" if year else f"{title} official trailer",
+        "part": "id",
+        "fields": "items/id/videoId",  # the only field we read
+        "maxResults": 1,
+        "type": "video",
+        "key": settings.YOUTUBE_API_KEY,
+    }
+    response = await get_http_client().get(settings.YOUTUBE_API_URL, params=params)
+
+    if response.status_code == 403 and _is_quota_error(response):
+        youtube_quota.exhaust()
+        raise QuotaExhausted(youtube_quota.seconds_until_reset())
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="YouTube API request failed")
+
+    items = response.json().get("items")
+    video_id = items[0]["id"].get("videoId") if items else None
+    return {"trailer_url": f"https://www.youtube.com/watch?v={video_id}" if video_id else None}
+
+
+def _trailer_ttl(result):
+    return settings.CACHE_TTL_TRAILER if result["trailer_url"] else settings.CACHE_TTL_TRAILER_NOT_FOUND
+
+
+async def find_trailer(title: str, year: str | None = None):
+    """Return the trailer URL for a movie, or None if YouTube has none.
+
+    Raises QuotaExhausted when the answer is not cached and no quota is left.
+    """
+    result = await trailer_cache.get_or_fetch(
+        f"{normalize_query(title)}|{year or ''}",
+        lambda: _search_youtube(title, year),
+        ttl_for=_trailer_ttl,
+    )
+    return result["trailer_url"]
+
+
+_prefetches: set[asyncio.Task] = set()
+
+
+def prefetch_trailer(title: str | None):
+    """Resolve a trailer in the background so the later /movies/trailer request is a cache hit.
+
+    Looked up by title alone, like /movies/trailer/{movie_name} without ?year=,
+    so both land on the same cache entry and the movie costs one search.
+
+    Prefetches only spend quota while more than YOUTUBE_PREFETCH_RESERVE units
+    are left, keeping the rest for explicit requests.
+    """
+    if not settings.TRAILER_PREFETCH_ENABLED or not title:
+        return
+    if youtube_quota.remaining() - settings.YOUTUBE_SEARCH_COST < settings.YOUTUBE_PREFETCH_RESERVE:
+        return
+    task = asyncio.create_task(_prefetch(title))
+    _prefetches.add(task)
+    task.add_done_callback(_prefetches.discard)
+
+
+async def _prefetch(title):
+    try:
+        await find_trailer(title)
+    except Exception as e:
+        print(f"Trailer prefetch for '{title}' failed: {e}")
+
+
+async def cancel_prefetches():
+    for task in list(_prefetches):
+        task.cancel()
+    await asyncio.gather(*_prefetches, return_exceptions=True)
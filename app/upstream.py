@@ -0,0 +1,199 @@
+import asyncio
+import email.utils
+import random
+import time
+import httpx
+from .config import settings
+from .metrics import observe_upstream
+
+
+class UpstreamUnavailable(httpx.TransportError):
+    """Raised instead of calling an upstream whose circuit is open or whose queue is full.
+
+    A TransportError, so the existing `except httpx.HTTPError` / `RequestError`
+    handlers treat it like any other failed request.
+    """
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets one trial request through after `reset_timeout`."""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def abandon(self):
+        """The request let through never reached the upstream; allow another trial."""
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+
+class _Host:
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(settings.UPSTREAM_HOST_CONCURRENCY)
+        self.bucket = TokenBucket(settings.UPSTREAM_RATE, settings.UPSTREAM_BURST)
+        self.breaker = CircuitBreaker(settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT)
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD"}
+
+
+class GovernedTransport(httpx.AsyncBaseTransport):
+    """Wraps the real transport of the shared client with an outbound governor.
+
+    Per upstream host: a circuit breaker that fails fast while the host is
+    unhealthy, a token-bucket rate limit and a concurrency limit, all under one
+    global concurrency limit. 429 / 5xx responses and transport errors on GET
+    requests are retried with full-jitter exponential backoff (honouring
+    Retry-After). Waiting for a slot, rate-limit token included, is bounded
+    by UPSTREAM_QUEUE_TIMEOUT so requests do not pile up behind a slow
+    upstream. The breaker counts the outcome of a request once, after its
+    retries, not once per attempt.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(settings.UPSTREAM_MAX_CONCURRENCY)
+        self._hosts: dict[str, _Host] = {}
+
+    def host(self, name: str):
+        host = self._hosts.get(name)
+        if host is None:
+            host = self._hosts[name] = _Host()
+        return host
+
+    def breaker_states(self):
+        return {name: host.breaker.state for name, host in self._hosts.items()}
+
+    async def handle_async_request(self, request: httpx.Request):
+        host = self.host(request.url.host)
+        if not host.breaker.allow():
+            raise UpstreamUnavailable(f"Circuit open for {request.url.host}", request=request)
+
+        try:
+            response = await self._send_with_retries(host, request)
+        except (UpstreamUnavailable, asyncio.CancelledError):
+            host.breaker.abandon()
+            raise
+        except httpx.TransportError:
+            host.breaker.record_failure()
+            raise
+
+        if response.status_code in RETRY_STATUSES:
+            host.breaker.record_failure()
+        else:
+            host.breaker.record_success()
+        return response
+
+    async def _send_with_retries(self, host: _Host, request: httpx.Request):
+        attempts = 1 + (settings.UPSTREAM_RETRIES if request.method in RETRY_METHODS else 0)
+        for attempt in range(attempts):
+            try:
+                response = await self._send(host, request)
+            except UpstreamUnavailable:
+                raise
+            except httpx.TransportError:
+                if attempt + 1 == attempts:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                return response
+            await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+
+    async def _acquire(self, host: _Host):
+        await host.bucket.acquire()
+        await self._semaphore.acquire()
+        try:
+            await host.semaphore.acquire()
+        except BaseException:
+            # Timed out (cancelled by wait_for) while holding the global slot
+            self._semaphore.release()
+            raise
+
+    async def _send(self, host: _Host, request: httpx.Request):
+        try:
+            await asyncio.wait_for(self._acquire(host), settings.UPSTREAM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise UpstreamUnavailable(f"No outbound slot for {request.url.host} within the queue timeout", request=request)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await self._transport.handle_async_request(request)
+            # Read the body while holding the slot, so the limit covers the whole exchange
+            await response.aread()
+            status = response.status_code
+            return response
+        finally:
+            host.semaphore.release()
+            self._semaphore.release()
+            observe_upstream(request.url.host, status, time.perf_counter() - start)
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str | None = None):
+        cap = min(settings.UPSTREAM_BACKOFF_MAX, settings.UPSTREAM_BACKOFF * 2 ** attempt)
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    return random.uniform(0, cap)
+            return max(0.0, min(seconds, settings.UPSTREAM_BACKOFF_MAX))
+        return random.uniform(0, cap)
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -1,8 +1,26 @@
+import asyncio
 from passlib.context import CryptContext
-pwd_context=CryptContext(schemes=['bcrypt'],deprecated="auto")
+from .config import settings
+from .executors import get_hash_executor
 
+# Pinning min/max to the configured cost makes verify_and_update() flag hashes
+# made with any other cost, so a BCRYPT_ROUNDS change is rolled out on login.
+pwd_context=CryptContext(
+    schemes=['bcrypt'],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def hash(pwd:str):
-    return pwd_context.hash(pwd)
-def verify(pwd,hash_pwd):
-    return pwd_context.verify(pwd,hash_pwd)  
\ No newline at end of file
+
+# bcrypt is deliberately slow (~200ms); the async variants run it on the
+# bounded hash executor so handlers never block the event loop.
+async def hash_async(pwd:str):
+    return await asyncio.get_running_loop().run_in_executor(get_hash_executor(), pwd_context.hash, pwd)
+
+async def verify_and_update_async(pwd,hash_pwd):
+    """Return (valid, new_hash); new_hash is set when the stored hash should be replaced."""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_hash_executor(), pwd_context.verify_and_update, pwd, hash_pwd
+    )
@@ -0,0 +1,85 @@
+"""Benchmark the TMDB HTML parsers over the saved fixtures.
+
+Compares the original html.parser implementation (bench/legacy_parsing.py)
+with app/parsing.py on every available backend, checks that all of them
+produce identical output, and prints one JSON document with the timings.
+
+    python -m bench.bench_parsing [--iterations 200]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from app import parsing
+from . import legacy_parsing
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "tmdb"
+
+CASES = {
+    "search.html": "parse_search_results",
+    "details.html": "parse_movie_details",
+    "backdrops.html": "parse_backdrops",
+    "watch.html": "parse_watch_links",
+    "listing.html": "parse_category_page",
+}
+
+
+def _comparable(name, result, fields=None):
+    # Backdrops come out of a set, so their order is not stable between runs
+    if name == "parse_backdrops":
+        return sorted(result)
+    # Only compare the fields the legacy parser produced (the details page gained title / year)
+    if fields is not None and isinstance(result, dict):
+        return {field: result.get(field) for field in fields}
+    return result
+
+
+def _time(fn, html, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(html)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run(iterations):
+    backends = sorted({parsing.resolve_backend(name) for name in parsing.PARSER_BACKENDS})
+    report = {"iterations": iterations, "backends": backends, "cases": {}}
+    mismatches = []
+
+    for fixture, name in CASES.items():
+        html = (FIXTURES / fixture).read_text(encoding="utf-8")
+        legacy = getattr(legacy_parsing, name)
+        parser = getattr(parsing, name)
+        expected = _comparable(name, legacy(html))
+
+        timings = {"legacy": round(_time(legacy, html, iterations), 3)}
+        for backend in backends:
+            fields = expected.keys() if isinstance(expected, dict) else None
+            if _comparable(name, parser(html, backend), fields) != expected:
+                mismatches.append(f"{fixture} [{backend}]")
+            timings[backend] = round(_time(lambda h: parser(h, backend), html, iterations), 3)
+
+        report["cases"][fixture] = {
+            "ms_per_parse": timings,
+            "speedup": {backend: round(timings["legacy"] / timings[backend], 2) for backend in backends},
+        }
+
+    report["identical_output"] = not mismatches
+    report["mismatches"] = mismatches
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    report = run(args.iterations)
+    print(json.dumps(report, indent=2))
+    return 0 if report["identical_output"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Local stand-in for TMDB and the YouTube search API, serving the saved fixtures.
+
+    python -m bench.fake_tmdb [--port 8901] [--latency-ms 0]
+
+Every TMDB path the scraper requests maps to one of bench/fixtures/tmdb/*.html;
+the YouTube search returns a fixed video id. --latency-ms delays each response
+to approximate a real upstream round trip.
+"""
+import argparse
+import asyncio
+from pathlib import Path
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse
+from starlette.routing import Route
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "tmdb"
+
+
+def create_app(latency: float = 0.0):
+    pages = {path.stem: path.read_text(encoding="utf-8") for path in FIXTURES.glob("*.html")}
+
+    def page(name):
+        async def endpoint(request):
+            if latency:
+                await asyncio.sleep(latency)
+            return HTMLResponse(pages[name])
+        return endpoint
+
+    async def youtube_search(request):
+        if latency:
+            await asyncio.sleep(latency)
+        return JSONResponse({"items": [{"id": {"videoId": "dQw4w9WgXcQ"}}]})
+
+    return Starlette(routes=[
+        Route("/search/movie", page("search")),
+        Route("/movie", page("listing")),
+        Route("/movie/top-rated", page("listing")),
+        Route("/movie/upcoming", page("listing")),
+        Route("/movie/{slug}/images/backdrops", page("backdrops")),
+        Route("/movie/{slug}/watch", page("watch")),
+        Route("/movie/{slug}", page("details")),
+        Route("/youtube/v3/search", youtube_search),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms / 1000), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
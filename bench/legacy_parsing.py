@@ -0,0 +1,116 @@
+"""The original html.parser / select_one scraping code, kept as the baseline for bench_parsing.py."""
+from bs4 import BeautifulSoup
+import re
+import urllib.parse
+
+
+def parse_search_results(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    movies = []
+
+    for card in soup.select('div.card.v4.tight'):
+        movie_link = card.select_one('a.result')
+        if not movie_link:
+            continue
+        href = movie_link['href']
+        if href.startswith("/tv/"):
+            continue
+        movie_url = f"https://www.themoviedb.org{href}"
+        movies.append({
+            "title": card.select_one('h2').get_text(strip=True) if card.select_one('h2') else "Unknown",
+            "poster": card.select_one('img')['src'] if card.select_one('img') else "No poster available",
+            "release_date": card.select_one('span.release_date').get_text(strip=True) if card.select_one('span.release_date') else "Unknown",
+            "overview": card.select_one('div.overview p').get_text(strip=True) if card.select_one('div.overview p') else "Overview not available",
+            "url": movie_url,
+        })
+
+    return movies
+
+
+def parse_movie_details(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    director = next(
+        (profile.select_one('a').get_text(strip=True)
+         for profile in soup.select('li.profile')
+         if profile.select_one('p.character') and 'Director' in profile.select_one('p.character').text),
+        None
+    )
+    if not director:
+        return None
+
+    cast = [
+        (card.select_one('p').get_text(strip=True), card.select_one('img')['src'] if card.select_one('img') else "No Image")
+        for card in soup.select('li.card')
+    ]
+    genres = [genre.get_text(strip=True) for genre in soup.select('span.genres a')]
+
+    facts_section = soup.select_one('div.facts')
+    runtime = facts_section.select_one('span.runtime').get_text(strip=True) if facts_section and facts_section.select_one('span.runtime') else "Unknown"
+    certificate = facts_section.select_one('span.certification').get_text(strip=True) if facts_section and facts_section.select_one('span.certification') else "Unknown"
+
+    language = next(
+        (tag.find_parent().get_text(strip=True).replace("Original Language", "").strip()
+         for tag in soup.find_all('strong', string=re.compile(r'Original Language', re.IGNORECASE))),
+        "Unknown"
+    )
+
+    watch_link_element = soup.select_one('a[href*="/watch"]')
+    overview_element = soup.select_one('div.overview p')
+    overview = overview_element.get_text(strip=True) if overview_element else "No overview available"
+
+    return {
+        "director": director,
+        "cast": cast,
+        "genres": genres,
+        "runtime": runtime,
+        "certificate": certificate,
+        "language": language,
+        "overview": overview,
+        "watch_url": f"https://www.themoviedb.org{watch_link_element['href']}" if watch_link_element else None,
+    }
+
+
+def parse_backdrops(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    images = set(a['href'] for a in soup.select('a[title="View Original"]'))
+    return list(images) if images else ["No backdrop images available"]
+
+
+def parse_watch_links(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    stream_section = soup.find('h3', string=re.compile(r'Stream', re.IGNORECASE))
+    if not stream_section:
+        return ["No watch links available"]
+
+    watch_links = []
+    for link in stream_section.find_next('ul', class_='providers').find_all('a', href=True):
+        match = re.search(r'r=(https%3A%2F%2F[^\&]+)', link['href'])
+        icon = link.find('img')['src'] if link.find('img') else None
+        if match and icon:
+            clean_url = urllib.parse.unquote(match.group(1))
+            if not any(item['url'] == clean_url for item in watch_links):
+                watch_links.append({'icon': icon, 'url': clean_url})
+
+    return watch_links if watch_links else ["No watch links available"]
+
+
+def parse_category_page(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    movies = []
+    for card in soup.select("div.card.style_1"):
+        title = card.select_one("h2").get_text(strip=True) if card.select_one("h2") else "Unknown"
+        release_date = card.select_one("div.content p").text if card.select_one("div.content p") else "Unknown"
+        poster = card.select_one("img")["src"] if card.select_one("img") else "No poster available"
+        movie_link = card.select_one("a")["href"] if card.select_one("a") else None
+        movie_url = f"https://www.themoviedb.org{movie_link}" if movie_link else "No URL available"
+        movies.append({
+            "title": title,
+            "release_date": release_date,
+            "poster": poster,
+            "url": movie_url
+        })
+
+    return movies
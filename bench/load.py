@@ -0,0 +1,254 @@
+"""Offline load test of the API.
+
+Starts bench/fake_tmdb.py and bench/serve.py as local subprocesses (no
+network, in-memory MongoDB), seeds users and reviews, then drives each
+scenario with --concurrency workers for --duration seconds and prints one
+JSON report with throughput and p50/p95/p99 latencies per scenario.
+
+    python -m bench.load [--concurrency 16] [--duration 10] [--scenarios search,details]
+                         [--env CACHE_TTL_DETAILS=0] [--baseline previous.json] [--output report.json]
+
+With --baseline the report also carries the relative change of each
+scenario's throughput and percentiles against an earlier report, so two
+commits can be compared run for run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from itertools import count
+
+import httpx
+
+MOVIE_URL = "https://www.themoviedb.org/movie/550-fight-club"
+PASSWORD = "bench-password"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class Scenarios:
+    """One coroutine per scenario; each issues a single request and returns the response."""
+
+    def __init__(self, client: httpx.AsyncClient, tokens: list[str]):
+        self.client = client
+        self.tokens = tokens
+        self._ids = count()
+
+    def _auth(self):
+        token = self.tokens[next(self._ids) % len(self.tokens)]
+        return {"Authorization": f"Bearer {token}"}
+
+    async def login(self):
+        user = next(self._ids) % len(self.tokens)
+        return await self.client.post("/logins/token", data={"username": f"bench{user}@example.com", "password": PASSWORD})
+
+    async def search(self):
+        return await self.client.get("/movies/search/fight club", headers=self._auth())
+
+    async def details(self):
+        return await self.client.get("/movies/details/", params={"movie_url": MOVIE_URL}, headers=self._auth())
+
+    async def popular(self):
+        return await self.client.get("/movies/popular", headers=self._auth())
+
+    async def popular_page(self):
+        return await self.client.get("/movies/popular", params={"page": 1}, headers=self._auth())
+
+    async def trailer(self):
+        return await self.client.get("/movies/trailer/Fight Club", params={"year": "1999"}, headers=self._auth())
+
+    async def reviews(self):
+        return await self.client.get("/review/getReviews/Bench Movie/2024", params={"limit": 20}, headers=self._auth())
+
+    async def review_add(self):
+        # A new movie every time, so each request is a real insert + counter upsert
+        movie = f"Bench Movie {next(self._ids)}"
+        return await self.client.post("/review/addReview", headers=self._auth(), json={
+            "movie_name": movie, "release_date": "2024", "review_content": "Benchmark review", "rating": 4,
+        })
+
+
+SCENARIOS = ["login", "search", "details", "popular", "popular_page", "trailer", "reviews", "review_add"]
+
+
+async def _wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def _seed(client: httpx.AsyncClient, users: int):
+    tokens = []
+    for i in range(users):
+        email = f"bench{i}@example.com"
+        await client.post("/users/createuser", json={"name": f"bench{i}", "email": email, "password": PASSWORD})
+        response = await client.post("/logins/token", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+
+    # Every user reviews the movie read by the `reviews` scenario
+    for i in range(users):
+        await client.post("/review/addReview", headers={"Authorization": f"Bearer {tokens[i]}"}, json={
+            "movie_name": "Bench Movie", "release_date": "2024", "review_content": f"Review {i}", "rating": i % 5 + 1,
+        })
+    return tokens
+
+
+def _percentile(ordered: list[float], fraction: float):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def _run_scenario(fn, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await fn()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(_percentile(ordered, 0.50)),
+        "p95_ms": ms(_percentile(ordered, 0.95)),
+        "p99_ms": ms(_percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else None,
+    }
+
+
+def _compare(report: dict, baseline: dict):
+    """Relative change per scenario metric; positive is more throughput / more latency."""
+    changes = {}
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            metric: round((result[metric] - before[metric]) / before[metric], 4)
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            if result.get(metric) is not None and before.get(metric)
+        }
+    return {"baseline_commit": baseline.get("commit"), "relative_change": changes}
+
+
+async def run(args):
+    app_port, upstream_port = _free_port(), _free_port()
+    env = {**os.environ, **dict(item.split("=", 1) for item in args.env)}
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "bench.fake_tmdb", "--port", str(upstream_port),
+                          "--latency-ms", str(args.upstream_latency_ms)], env=env),
+        subprocess.Popen([sys.executable, "-m", "bench.serve", "--port", str(app_port),
+                          "--upstream", f"http://127.0.0.1:{upstream_port}"], env=env),
+    ]
+    try:
+        base_url = f"http://127.0.0.1:{app_port}"
+        await _wait_until_up(f"http://127.0.0.1:{upstream_port}/movie")
+        await _wait_until_up(f"{base_url}/docs")
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            tokens = await _seed(client, args.users)
+            scenarios = Scenarios(client, tokens)
+
+            report = {
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "warmup_s": args.warmup,
+                "users": args.users,
+                "upstream_latency_ms": args.upstream_latency_ms,
+                "env": args.env,
+                "scenarios": {},
+            }
+            for name in args.scenarios:
+                fn = getattr(scenarios, name)
+                if args.warmup:
+                    await _run_scenario(fn, args.concurrency, args.warmup)
+                report["scenarios"][name] = await _run_scenario(fn, args.concurrency, args.duration)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = _compare(report, json.load(f))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=SCENARIOS,
+                        help=f"comma separated, from {','.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=8, help="seeded users, each with one review")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0, help="delay added by the fake TMDB")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="setting override for the app process, repeatable")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if any(result["errors"] for result in report["scenarios"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
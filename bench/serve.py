@@ -0,0 +1,89 @@
+"""Run the app fully offline for benchmarking.
+
+    python -m bench.serve --port 8900 --upstream http://127.0.0.1:8901
+
+MongoDB is replaced by mongomock-motor (in memory, empty on every start) and
+every outbound request of the shared HTTP client is sent to --upstream (see
+bench/fake_tmdb.py) instead of TMDB / YouTube. Nothing else is changed: the
+outbound governor, caches, parse executor and background refresh all run as
+in production. Settings can be overridden through the environment as usual.
+"""
+import argparse
+import os
+
+import httpx
+import uvicorn
+
+# Settings() is created at import time and requires these; placeholders are fine offline
+OFFLINE_ENV = {
+    "DATABASE_URL": "mongodb://offline",
+    "DATABASE_NAME": "cineflix_bench",
+    "MAIL_USERNAME": "bench",
+    "MAIL_PASSWORD": "bench",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_PORT": "587",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "cineflix bench",
+    "YOUTUBE_API_KEY": "bench",
+    "YOUTUBE_API_URL": "https://www.googleapis.com/youtube/v3/search",
+    "HTTP2_ENABLED": "false",  # the stand-in speaks plain HTTP/1.1
+    "RATE_LIMIT_ENABLED": "false",  # every bench client comes from 127.0.0.1
+}
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Sends every request to `upstream`, keeping its path and query."""
+
+    def __init__(self, upstream: str, transport: httpx.AsyncBaseTransport):
+        self.upstream = httpx.URL(upstream)
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request):
+        request.url = request.url.copy_with(
+            scheme=self.upstream.scheme, host=self.upstream.host, port=self.upstream.port
+        )
+        request.headers["Host"] = request.url.netloc.decode()
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def install_offline_backends(upstream: str):
+    from mongomock_motor import AsyncMongoMockClient
+    from app import http_client, main
+    from app.config import settings
+    from app.upstream import GovernedTransport
+
+    def create_http_client():
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        transport = RedirectTransport(upstream, httpx.AsyncHTTPTransport(limits=limits))
+        return httpx.AsyncClient(
+            transport=GovernedTransport(transport),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+            follow_redirects=True,
+        )
+
+    http_client.create_http_client = create_http_client
+    main.AsyncIOMotorClient = lambda url, **kwargs: AsyncMongoMockClient()
+    return main.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--upstream", default="http://127.0.0.1:8901")
+    args = parser.parse_args()
+
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+    app = install_offline_backends(args.upstream)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()